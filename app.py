@@ -1,7 +1,8 @@
 import os
 import logging
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters
-from handlers.telegram_handler import start_command, handle_document
+from handlers.telegram_handler import start_command, stats_command, handle_document
+from handlers.job_queue import shutdown_job_queue
 
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,8 +15,9 @@ def main():
         return
 
     logger.info("Initializing Telegram Bot...")
-    application = ApplicationBuilder().token(TOKEN).build()
+    application = ApplicationBuilder().token(TOKEN).post_shutdown(shutdown_job_queue).build()
     application.add_handler(CommandHandler("start", start_command))
+    application.add_handler(CommandHandler("stats", stats_command))
     application.add_handler(MessageHandler(filters.Document.ALL, handle_document))
     
     application.run_polling()
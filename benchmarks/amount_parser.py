@@ -0,0 +1,64 @@
+"""
+Microbenchmark: amount parsing in process_main_data.
+Compares the original regex cleaning pass with parse_amount_cents.
+
+Usage: python -m benchmarks.amount_parser [rows]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from transformations.data_transformations import parse_amount_cents
+
+
+def legacy_parse(amounts):
+    """The cleaning pass process_main_data used before parse_amount_cents."""
+    cleaned = amounts.astype(str).str.replace(r'[^\d\.]', '', regex=True)
+    return pd.to_numeric(cleaned, errors='coerce').abs()
+
+
+def make_amounts(rows, messy_share=0.1, seed=42):
+    """Builds plain decimal strings with a share of currency/locale formatted ones mixed in."""
+    rng = np.random.default_rng(seed)
+    values = rng.lognormal(mean=3, sigma=1.2, size=rows).round(2)
+    text = pd.Series(values).map('{:.2f}'.format)
+
+    messy = rng.random(rows) < messy_share
+    styles = rng.integers(0, 4, size=rows)
+    formatted = np.where(
+        styles == 0, '€' + text,
+        np.where(styles == 1, pd.Series(values).map('{:,.2f}'.format),
+        np.where(styles == 2, text.str.replace('.', ',', regex=False), '-' + text))
+    )
+    return pd.Series(np.where(messy, formatted, text)), pd.Series(values)
+
+
+def _time(fn, data, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(rows=1_000_000):
+    strings, numbers = make_amounts(rows)
+    results = {
+        "rows": rows,
+        "legacy_strings_s": _time(legacy_parse, strings),
+        "parser_strings_s": _time(parse_amount_cents, strings),
+        "legacy_numeric_s": _time(legacy_parse, numbers),
+        "parser_numeric_s": _time(parse_amount_cents, numbers),
+    }
+    results["speedup_strings"] = results["legacy_strings_s"] / results["parser_strings_s"]
+    results["speedup_numeric"] = results["legacy_numeric_s"] / results["parser_numeric_s"]
+    return results
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    for key, value in run(rows).items():
+        print(f"{key:>20}: {value:.4f}" if isinstance(value, float) else f"{key:>20}: {value}")
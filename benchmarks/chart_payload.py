@@ -0,0 +1,79 @@
+"""
+Plotly payload of the two burn charts with and without LTTB downsampling.
+Builds the summary tables for a synthetic multi-year, multi-country export,
+then builds each figure at full resolution and capped at CHART_WIDTH_PX points
+per figure, reporting points, serialized JSON size and build+serialize time.
+Also checks that the downsampled burn curve crosses TOTAL_BUDGET on the same day.
+
+Usage: python -m benchmarks.chart_payload [rows ...]
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+
+import plotly.io as pio
+
+from benchmarks.generator import generate_csv
+from processors.file_processor import load_and_process_data
+from services.dashboard_service import (
+    build_cumulative_burn_figure,
+    build_country_comparison_burn_figure,
+    CHART_WIDTH_PX,
+    TOTAL_BUDGET,
+)
+
+DEFAULT_ROWS = [100_000, 1_000_000]
+
+
+def _measure(build):
+    start = time.perf_counter()
+    fig = build()
+    payload = pio.to_json(fig, validate=False)
+    elapsed = time.perf_counter() - start
+    return fig, {
+        "points": sum(len(trace.x) for trace in fig.data),
+        "payload_kb": round(len(payload) / 1024, 1),
+        "render_s": round(elapsed, 4),
+    }
+
+
+def _crossing_date(fig):
+    """First x of the burn curve at or above the budget, or None."""
+    trace = fig.data[0]
+    above = [x for x, y in zip(trace.x, trace.y) if y >= TOTAL_BUDGET]
+    return above[0] if above else None
+
+
+def run_rows(rows, workdir):
+    summaries = load_and_process_data(generate_csv(rows, os.path.join(workdir, f"export_{rows}.csv")))
+    results = {"rows": rows}
+    charts = {
+        "cumulative_burn": lambda max_points: build_cumulative_burn_figure(summaries, TOTAL_BUDGET, max_points),
+        "country_comparison_burn": lambda max_points: build_country_comparison_burn_figure(summaries, max_points),
+    }
+    for name, build in charts.items():
+        full_fig, full = _measure(lambda: build(None))
+        sampled_fig, sampled = _measure(lambda: build(CHART_WIDTH_PX))
+        results[name] = {
+            "full": full,
+            "downsampled": sampled,
+            "payload_ratio": round(sampled["payload_kb"] / full["payload_kb"], 3),
+        }
+        if name == "cumulative_burn":
+            assert _crossing_date(full_fig) == _crossing_date(sampled_fig), "budget crossing moved"
+            results[name]["budget_crossing"] = _crossing_date(sampled_fig)
+    return results
+
+
+def run(rows_list=None):
+    with tempfile.TemporaryDirectory() as workdir:
+        return [run_rows(rows, workdir) for rows in (rows_list or DEFAULT_ROWS)]
+
+
+if __name__ == '__main__':
+    for name in ("services", "processors", "transformations"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    for result in run([int(value) for value in sys.argv[1:]] or None):
+        print(result)
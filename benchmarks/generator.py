@@ -0,0 +1,100 @@
+"""
+Deterministic generator of realistic Travel Spend CSV exports.
+Skewed categories, many countries, messy amount strings, some bad dates and the
+extra columns a real export carries that the pipeline ignores.
+
+Usage: python -m benchmarks.generator rows [output.csv]
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from transformations.data_transformations import DATE_COL, AMOUNT_COL, CATEGORY_COL, COUNTRY_COL
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+GENERATED_DIR = os.path.join("benchmarks", "data")
+
+CATEGORIES = [
+    "Food", "Accommodation", "Transport", "Activities", "Groceries", "Drinks",
+    "Shopping", "Flights", "Health", "Medical", "Laundry", "Sim Card", "Visa", "Tips",
+]
+COUNTRIES = [
+    "Spain", "Portugal", "France", "Italy", "Greece", "Croatia", "Turkey", "Georgia",
+    "Japan", "South Korea", "Taiwan", "Vietnam", "Thailand", "Cambodia", "Laos",
+    "Malaysia", "Indonesia", "Philippines", "India", "Nepal", "Sri Lanka", "Australia",
+    "New Zealand", "Fiji", "Mexico", "Guatemala", "Costa Rica", "Colombia", "Ecuador",
+    "Peru", "Bolivia", "Chile", "Argentina", "Brazil", "Uruguay", "Morocco", "Egypt",
+    "Kenya", "Tanzania", "Ireland",
+]
+# Rows written per pass, so even the 10M export is generated in bounded memory
+CHUNK_ROWS = 500_000
+
+
+def _zipf_weights(n, skew=1.1):
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    return weights / weights.sum()
+
+
+def _messy_amounts(rng, values):
+    """Formats amounts mostly as plain decimals, with currency symbols, locales and junk mixed in."""
+    plain = pd.Series(values).map('{:.2f}'.format)
+    style = rng.choice(6, size=len(values), p=[0.82, 0.05, 0.04, 0.04, 0.03, 0.02])
+    return np.select(
+        [style == 1, style == 2, style == 3, style == 4, style == 5],
+        [
+            '€' + plain,
+            pd.Series(values).map('{:,.2f}'.format),
+            plain.str.replace('.', ',', regex=False),
+            '-' + plain,
+            'n/a',
+        ],
+        default=plain,
+    )
+
+
+def generate_chunk(rows, seed, start_id=0):
+    """Returns one chunk of a synthetic export as a DataFrame in the raw export layout."""
+    rng = np.random.default_rng(seed)
+    days = rng.integers(0, 3 * 365, size=rows)
+    dates = (pd.Timestamp('2022-01-01') + pd.to_timedelta(days, unit='D')).strftime('%Y-%m-%d')
+    # About 0.5% of dates are unparseable, as in hand-edited exports
+    dates = np.where(rng.random(rows) < 0.005, 'not a date', dates)
+
+    amounts = rng.lognormal(mean=2.8, sigma=1.1, size=rows).round(2)
+    return pd.DataFrame({
+        "id": np.arange(start_id, start_id + rows),
+        DATE_COL: dates,
+        "dateCreated": dates,
+        "description": rng.choice(["Lunch", "Dinner", "Bus", "Hostel", "Museum", "Coffee", ""], size=rows),
+        AMOUNT_COL: _messy_amounts(rng, amounts),
+        "amount": amounts,
+        "currency": rng.choice(["EUR", "USD", "JPY", "VND", "MXN"], size=rows),
+        CATEGORY_COL: rng.choice(CATEGORIES, size=rows, p=_zipf_weights(len(CATEGORIES))),
+        COUNTRY_COL: rng.choice(COUNTRIES, size=rows, p=_zipf_weights(len(COUNTRIES), skew=0.8)),
+        "tags": rng.choice(["", "trip", "work", "shared"], size=rows),
+        "notes": rng.choice(["", "paid cash", "card", "split with friends"], size=rows),
+    })
+
+
+def generate_csv(rows, path=None, seed=2024):
+    """Writes a synthetic export of the given size. Same rows + seed -> byte-identical file."""
+    if path is None:
+        path = os.path.join(GENERATED_DIR, f"travel_spend_{rows}.csv")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        while written < rows:
+            chunk_rows = min(CHUNK_ROWS, rows - written)
+            chunk = generate_chunk(chunk_rows, seed=seed + written, start_id=written)
+            chunk.to_csv(f, index=False, header=(written == 0))
+            written += chunk_rows
+    return path
+
+
+if __name__ == '__main__':
+    size = sys.argv[1] if len(sys.argv) > 1 else "100k"
+    rows = SIZES.get(size.lower()) or int(size)
+    print(generate_csv(rows, sys.argv[2] if len(sys.argv) > 2 else None))
@@ -0,0 +1,65 @@
+"""
+Loading the last two months from Sheets as the trip history grows: one
+monolithic 'Cleaned_Data' tab vs month partitions read through the index.
+Uses the local backend with a simulated per-call latency.
+
+Usage: python -m benchmarks.partitions [latency_ms]
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+
+from benchmarks.generator import generate_csv
+from processors.file_processor import load_and_process_data
+from services.google_sheet_services import GoogleSheetsService, RequestScheduler
+from services.partitioning import plan_partition_upload, read_partitions
+from services.storage_backends import LocalBackend
+from transformations.data_transformations import ANALYSIS_COLS
+
+HISTORY_MONTHS = [6, 12, 24, 36]
+ROWS_PER_YEAR = 40_000
+
+
+def _time(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, round(time.perf_counter() - start, 4)
+
+
+def run_history(cleaned, months, latency_ms, workdir):
+    kept = sorted(cleaned['Month'].unique())[-months:]
+    df = cleaned[cleaned['Month'].isin(kept)].reset_index(drop=True)
+    # No pacing: this measures data volume, not the request quota
+    service = GoogleSheetsService(
+        backend=LocalBackend(os.path.join(workdir, f"history_{months}.sqlite3"), latency_ms=latency_ms),
+        scheduler=RequestScheduler(requests_per_minute=1e9, burst=10**6),
+    )
+    service.write_dataframes_to_sheets(dict(plan_partition_upload(service, df)[0], Cleaned_Data=df))
+
+    recent = kept[-2:]
+    monolithic, monolithic_s = _time(lambda: service.read_columns_to_dataframe("Cleaned_Data", ANALYSIS_COLS))
+    partitioned, partitioned_s = _time(lambda: read_partitions(service, ANALYSIS_COLS, recent))
+    return {
+        "months": months,
+        "rows": len(df),
+        "monolithic_s": monolithic_s,
+        "monolithic_rows_read": len(monolithic),
+        "last_2_months_s": partitioned_s,
+        "last_2_months_rows_read": len(partitioned),
+    }
+
+
+def run(latency_ms=50):
+    with tempfile.TemporaryDirectory() as workdir:
+        path = generate_csv(3 * ROWS_PER_YEAR, os.path.join(workdir, "export.csv"))
+        cleaned = load_and_process_data(path)["Cleaned_Data"]
+        return [run_history(cleaned, months, latency_ms, workdir) for months in HISTORY_MONTHS]
+
+
+if __name__ == '__main__':
+    for name in ("services", "processors", "transformations"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    for result in run(float(sys.argv[1]) if len(sys.argv) > 1 else 50):
+        print(result)
@@ -0,0 +1,83 @@
+"""
+Peak memory per dashboard render: the summary builders as they were at BASELINE_REV,
+which defensively copied their input, vs the current read-only ones that share a frame.
+The baseline module is loaded straight from git history, so both sides run real code.
+The read-only contract itself is covered by tests/test_transformations.py.
+
+Usage: python -m benchmarks.render_memory [rows] [baseline_rev]
+"""
+import sys
+import time
+import types
+import subprocess
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from transformations.data_transformations import (
+    process_main_data,
+    SUMMARY_BUILDERS,
+    CSV_SCHEMA,
+    DATE_COL,
+    AMOUNT_COL,
+    CATEGORY_COL,
+    COUNTRY_COL,
+)
+
+# Last revision whose calculate_* functions copied the frame they were given
+BASELINE_REV = "db0cfb1~1"
+TRANSFORMATIONS_PATH = "transformations/data_transformations.py"
+
+
+def make_frame(rows, seed=7):
+    """Builds a canonical transaction frame via process_main_data."""
+    rng = np.random.default_rng(seed)
+    raw = pd.DataFrame({
+        DATE_COL: (pd.Timestamp('2022-01-01') + pd.to_timedelta(rng.integers(0, 900, rows), unit='D')).strftime('%Y-%m-%d'),
+        AMOUNT_COL: rng.lognormal(3, 1.2, rows).round(2).astype(str),
+        CATEGORY_COL: rng.choice(['Food', 'Hotel', 'Transport', 'Activities', 'Shopping', 'Health'], rows),
+        COUNTRY_COL: rng.choice(['Spain', 'Japan', 'Vietnam', 'Mexico', 'Peru', 'Ireland'], rows),
+    }).astype(CSV_SCHEMA)
+    return process_main_data(raw)
+
+
+def load_baseline(rev=BASELINE_REV):
+    """Imports the transformation module as it was at a git revision."""
+    source = subprocess.check_output(["git", "show", f"{rev}:{TRANSFORMATIONS_PATH}"], text=True)
+    module = types.ModuleType(f"data_transformations_at_{rev}")
+    exec(compile(source, f"{rev}:{TRANSFORMATIONS_PATH}", "exec"), module.__dict__)
+    return module
+
+
+def render(builders, df):
+    """One dashboard render: every summary builder receives the same frame."""
+    for builder in builders.values():
+        builder(df)
+
+
+def measure(builders, df):
+    tracemalloc.start()
+    start = time.perf_counter()
+    render(builders, df)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(elapsed, 4), "peak_mb": round(peak / 2**20, 2)}
+
+
+def run(rows=500_000, baseline_rev=BASELINE_REV):
+    df = make_frame(rows)
+    baseline = load_baseline(baseline_rev)
+    return {
+        "rows": len(df),
+        "baseline": baseline_rev,
+        "baseline_builders": measure(baseline.SUMMARY_BUILDERS, df),
+        "current_builders": measure(SUMMARY_BUILDERS, df),
+    }
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    for key, value in run(rows, *sys.argv[2:3]).items():
+        print(f"{key:>17}: {value}")
@@ -0,0 +1,136 @@
+"""
+Benchmark suite for the upload pipeline and the dashboard aggregations.
+Times and measures peak memory for load_csv_file, process_main_data, every
+calculate_* in transformations/data_transformations.py and the Sheets payload
+serialisation, then saves the results as JSON so commits can be compared.
+
+Usage:
+    python -m benchmarks.run [10k 100k 1m 10m]       # run and save results
+    python -m benchmarks.run compare OLD.json NEW.json
+"""
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from benchmarks.generator import SIZES, GENERATED_DIR, generate_csv
+from processors.file_processor import load_csv_file
+from services.google_sheet_services import dataframe_to_values
+from transformations import data_transformations
+from transformations.data_transformations import (
+    process_main_data,
+    build_spend_cube,
+    format_for_sheets,
+)
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+DEFAULT_SIZES = ["10k", "100k"]
+# A slowdown beyond this ratio is flagged by `compare`
+REGRESSION_THRESHOLD = 1.10
+
+
+def _calculate_functions():
+    return {
+        name: fn for name, fn in vars(data_transformations).items()
+        if name.startswith("calculate_") and callable(fn)
+    }
+
+
+def _measure(fn, *args):
+    """Runs fn twice: once for wall time, once under tracemalloc for peak memory."""
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {"seconds": round(elapsed, 5), "peak_mb": round(peak / 2**20, 3)}
+
+
+def _git_commit():
+    """Short commit of the measured code, suffixed '-dirty' when the working tree has local changes."""
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty", "--abbrev=7"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def run_size(label):
+    rows = SIZES[label]
+    path = os.path.join(GENERATED_DIR, f"travel_spend_{rows}.csv")
+    if not os.path.exists(path):
+        generate_csv(rows, path)
+
+    stages = {}
+    raw, stages["load_csv_file"] = _measure(load_csv_file, path)
+    df, stages["process_main_data"] = _measure(process_main_data, raw)
+    _, stages["build_spend_cube"] = _measure(build_spend_cube, df)
+    for name, fn in _calculate_functions().items():
+        _, stages[name] = _measure(fn, df)
+
+    sheet_frame = format_for_sheets(df)
+    _, stages["format_for_sheets"] = _measure(format_for_sheets, df)
+    payload, stages["dataframe_to_values"] = _measure(dataframe_to_values, sheet_frame)
+    stages["dataframe_to_values"]["payload_mb"] = round(len(json.dumps(payload)) / 2**20, 3)
+
+    return {"rows": rows, "clean_rows": len(df), "stages": stages}
+
+
+def run(sizes):
+    results = {
+        "commit": _git_commit(),
+        "created": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "sizes": {label: run_size(label) for label in sizes},
+    }
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return path, results
+
+
+def compare(old_path, new_path):
+    """Prints per-stage time ratios between two result files and flags regressions."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    regressions = 0
+    print(f"{'size':>6} {'stage':<48} {'old s':>9} {'new s':>9} {'ratio':>7}")
+    for label, new_size in new["sizes"].items():
+        old_stages = old["sizes"].get(label, {}).get("stages", {})
+        for stage, metrics in new_size["stages"].items():
+            if stage not in old_stages:
+                continue
+            old_s, new_s = old_stages[stage]["seconds"], metrics["seconds"]
+            ratio = new_s / old_s if old_s else float('inf')
+            flag = "  <-- slower" if ratio > REGRESSION_THRESHOLD else ""
+            regressions += bool(flag)
+            print(f"{label:>6} {stage:<48} {old_s:>9.4f} {new_s:>9.4f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if args and args[0] == "compare":
+        sys.exit(1 if compare(args[1], args[2]) else 0)
+
+    sizes = [size.lower() for size in args] or DEFAULT_SIZES
+    path, results = run(sizes)
+    for label, result in results["sizes"].items():
+        print(f"--- {label} ({result['rows']} rows, {result['clean_rows']} clean) ---")
+        for stage, metrics in result["stages"].items():
+            print(f"{stage:<48} {metrics['seconds']:>9.4f}s {metrics['peak_mb']:>9.2f} MB")
+    print(f"Saved results to {path}")
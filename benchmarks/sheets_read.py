@@ -0,0 +1,93 @@
+"""
+Reading 'Cleaned_Data' back from Sheets: per-row records vs column-projected reads.
+Publishes a synthetic export to the local backend, fetches each path's raw
+payload once, then times the client-side decode up to canonical dtypes and
+reports the JSON payload each path pulls over the wire (what dominates on the
+real API). Paths:
+- records: one dict per row, as gspread's get_all_records built them
+- full: every column as raw rows (read_sheet_to_dataframe)
+- projected: only the analysis columns, column-wise (read_columns_to_dataframe)
+
+Usage: python -m benchmarks.sheets_read [rows ...]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+
+import pandas as pd
+
+from benchmarks.generator import generate_csv
+from processors.file_processor import load_and_process_data
+from services.google_sheet_services import GoogleSheetsService, dataframe_to_values, values_to_dataframe
+from services.storage_backends import LocalBackend
+from transformations.data_transformations import apply_canonical_schema, ANALYSIS_COLS
+
+DEFAULT_ROWS = [50_000, 200_000]
+TAB = "Cleaned_Data"
+
+
+def _decode_records(rows):
+    return apply_canonical_schema(pd.DataFrame([dict(zip(rows[0], row)) for row in rows[1:]]))
+
+
+def _decode_rows(rows):
+    return apply_canonical_schema(values_to_dataframe(rows))
+
+
+def _decode_columns(columns):
+    return apply_canonical_schema(pd.DataFrame(dict(zip(ANALYSIS_COLS, columns))))
+
+
+def _time(fn, payload, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = fn(payload)
+        best = min(best, time.perf_counter() - start)
+    return df, {"decode_s": round(best, 4), "payload_mb": round(len(json.dumps(payload)) / 2**20, 2)}
+
+
+def run_rows(rows, workdir):
+    sheets_data = load_and_process_data(generate_csv(rows, os.path.join(workdir, f"export_{rows}.csv")), incremental=True)
+    backend = LocalBackend(os.path.join(workdir, f"sheets_{rows}.sqlite3"))
+    backend.write_tab(TAB, dataframe_to_values(sheets_data[TAB]))
+
+    # Same requests GoogleSheetsService makes for each path
+    all_rows = backend.read_tab(TAB)
+    header = backend.read_range(TAB, "1:1")[0]
+    letters = [chr(ord("A") + header.index(col)) for col in ANALYSIS_COLS]
+    columns = backend.read_column_ranges([TAB], [f"{letter}2:{letter}" for letter in letters])[TAB]
+
+    results = {"rows": len(sheets_data[TAB])}
+    frames = {}
+    for label, fn, payload in (
+        ("records", _decode_records, all_rows),
+        ("full", _decode_rows, all_rows),
+        ("projected", _decode_columns, columns),
+    ):
+        frames[label], results[label] = _time(fn, payload)
+
+    # The service method must agree with the decode measured here
+    service = GoogleSheetsService(backend=backend)
+    served = apply_canonical_schema(service.read_columns_to_dataframe(TAB, ANALYSIS_COLS))
+    pd.testing.assert_frame_equal(served, frames["projected"])
+    pd.testing.assert_frame_equal(frames["projected"], frames["records"][ANALYSIS_COLS])
+
+    results["decode_speedup_vs_records"] = round(results["records"]["decode_s"] / results["projected"]["decode_s"], 2)
+    results["payload_ratio_vs_records"] = round(results["projected"]["payload_mb"] / results["records"]["payload_mb"], 2)
+    return results
+
+
+def run(rows_list=None):
+    with tempfile.TemporaryDirectory() as workdir:
+        return [run_rows(rows, workdir) for rows in (rows_list or DEFAULT_ROWS)]
+
+
+if __name__ == '__main__':
+    for name in ("services", "processors", "transformations"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    for result in run([int(value) for value in sys.argv[1:]] or None):
+        print(result)
@@ -0,0 +1,70 @@
+"""
+Offline upload -> dashboard round trip against the local storage backend.
+Publishes every tab of a synthetic export, then performs the dashboard's Sheets
+reads (version check, summary batch, full 'Cleaned_Data'), with a simulated API
+latency per call so the effect of round trips is visible without credentials.
+
+Usage: python -m benchmarks.sheets_roundtrip [rows] [latency_ms ...]
+"""
+import os
+import sys
+import time
+import tempfile
+
+from benchmarks.generator import generate_csv
+from processors.file_processor import load_and_process_data
+from services.google_sheet_services import GoogleSheetsService
+from services.storage_backends import LocalBackend
+from transformations.data_transformations import apply_canonical_schema, SUMMARY_BUILDERS, RECENT_TRANSACTIONS_TAB
+
+DEFAULT_LATENCIES_MS = [0, 50, 150]
+
+
+def _phase(backend, fn):
+    """Runs fn and returns its wall time and the backend calls it made."""
+    backend.calls.clear()
+    start = time.perf_counter()
+    fn()
+    return {"seconds": round(time.perf_counter() - start, 4), "calls": sum(backend.calls.values())}
+
+
+def run_latency(sheets_data, latency_ms, workdir):
+    backend = LocalBackend(os.path.join(workdir, f"sheets_{latency_ms}ms.sqlite3"), latency_ms=latency_ms)
+    service = GoogleSheetsService(backend=backend)
+
+    def upload():
+        failed = service.write_dataframes_to_sheets(sheets_data)
+        if failed:
+            raise RuntimeError(f"Failed to write {failed}")
+        service.write_data_version("benchmark", "benchmark", "benchmark")
+
+    def read_summaries():
+        service.read_data_version()
+        service.read_sheets_to_dataframes(list(SUMMARY_BUILDERS) + [RECENT_TRANSACTIONS_TAB])
+
+    def read_cleaned_data():
+        apply_canonical_schema(service.read_sheet_to_dataframe("Cleaned_Data"))
+
+    return {
+        "upload": _phase(backend, upload),
+        "dashboard_summaries": _phase(backend, read_summaries),
+        "dashboard_cleaned_data": _phase(backend, read_cleaned_data),
+    }
+
+
+def run(rows=50_000, latencies_ms=None):
+    with tempfile.TemporaryDirectory() as workdir:
+        sheets_data = load_and_process_data(generate_csv(rows, os.path.join(workdir, "export.csv")))
+        return {
+            f"{latency}ms": run_latency(sheets_data, latency, workdir)
+            for latency in (latencies_ms or DEFAULT_LATENCIES_MS)
+        }
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    latencies = [float(value) for value in sys.argv[2:]] or None
+    for latency, phases in run(rows, latencies).items():
+        print(f"--- {latency} per call ---")
+        for phase, metrics in phases.items():
+            print(f"{phase:>24}: {metrics['seconds']:>8.3f}s in {metrics['calls']} calls")
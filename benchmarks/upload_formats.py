@@ -0,0 +1,72 @@
+"""
+Transfer size and parse time of an export uploaded as plain CSV, .csv.gz and
+.zip. The old path (bytes written to downloads/ and read back from disk) is
+timed against parsing the downloaded bytes in memory, for each format.
+Also checks that every variant yields the same cleaned frame.
+
+Usage: python -m benchmarks.upload_formats [rows ...]
+"""
+import io
+import os
+import sys
+import gzip
+import time
+import logging
+import zipfile
+import tempfile
+
+import pandas as pd
+
+from benchmarks.generator import generate_csv
+from processors.file_processor import load_and_clean_csv_chunks
+
+DEFAULT_ROWS = [100_000, 1_000_000]
+
+
+def _best(fn, repeat=3):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, round(best, 4)
+
+
+def _zip(raw):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("export.csv", raw)
+    return buffer.getvalue()
+
+
+def run_rows(rows, workdir):
+    path = generate_csv(rows, os.path.join(workdir, f"export_{rows}.csv"))
+    with open(path, "rb") as f:
+        raw = f.read()
+    uploads = {"csv": raw, "csv.gz": gzip.compress(raw), "zip": _zip(raw)}
+
+    def via_disk():
+        copy = os.path.join(workdir, "downloads.csv")
+        with open(copy, "wb") as f:
+            f.write(raw)
+        return load_and_clean_csv_chunks(copy)
+
+    expected, disk_s = _best(via_disk)
+    results = {"rows": rows, "csv_via_disk_s": disk_s}
+    for suffix, data in uploads.items():
+        df, parse_s = _best(lambda: load_and_clean_csv_chunks(data, name=f"export.{suffix}"))
+        pd.testing.assert_frame_equal(df, expected)
+        results[suffix] = {"upload_mb": round(len(data) / 2**20, 2), "in_memory_s": parse_s}
+    return results
+
+
+def run(rows_list=None):
+    with tempfile.TemporaryDirectory() as workdir:
+        return [run_rows(rows, workdir) for rows in (rows_list or DEFAULT_ROWS)]
+
+
+if __name__ == '__main__':
+    for name in ("services", "processors", "transformations"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    for result in run([int(value) for value in sys.argv[1:]] or None):
+        print(result)
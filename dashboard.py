@@ -3,9 +3,12 @@ import plotly.express as px
 import os
 import pandas as pd
 import logging
+from transformations.data_transformations import RECENT_TRANSACTIONS_TAB
+from services.render_profiler import start_profile, profile_section, render_profile_panel
 from services.dashboard_service import (
-    get_data, chart_daily_avg_category_per_country, plot_cumulative_burn, plot_total_spend,
-    plot_daily_average_per_category, plot_total_and_average_per_country, plot_country_comparison_burn
+    get_summaries, figure_cache, chart_daily_avg_category_per_country, plot_cumulative_burn, plot_total_spend,
+    plot_daily_average_per_category, plot_total_and_average_per_country, plot_country_comparison_burn,
+    get_available_months, table_transactions, RECENT_MONTHS
 )
 
 # --- LOGGING SETUP ---
@@ -16,7 +19,6 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # --- UI LAYOUT ---
-df = get_data()
 st.set_page_config(
     page_title="Travel Expenses",
     page_icon="🌍",
@@ -25,25 +27,77 @@ st.set_page_config(
 )
 
 st.header("🌍 Travel Expenses")
+# Opt-in with ?profile=1 or DASHBOARD_PROFILE=true
+start_profile()
 
-if df.empty:
+# Fragments rerun on their own when their widgets change, reusing the summaries
+# passed on the last full run. Tabs and the expander report whether they are
+# open, so hidden sections build nothing until they are shown.
+@st.fragment
+def charts_section(summaries):
+    categories, countries, over_time, breakdown = st.tabs(
+        ["Categories", "Countries", "Over Time", "Breakdown"], key="chart_tab", on_change="rerun"
+    )
+    with categories:
+        if categories.open:
+            plot_daily_average_per_category(summaries)
+    with countries:
+        if countries.open:
+            plot_total_and_average_per_country(summaries)
+    with over_time:
+        if over_time.open:
+            burn1, burn2 = st.columns([1, 1], gap="small")
+            with burn1:
+                plot_cumulative_burn(summaries)
+            with burn2:
+                plot_country_comparison_burn(summaries)
+    with breakdown:
+        if breakdown.open:
+            chart_daily_avg_category_per_country(summaries)
+    logger.info(f"Figure cache: {figure_cache.stats()}")
+
+@st.fragment
+def recent_transactions_section(summaries):
+    # --- 6. RECENT TRANSACTIONS ---
+    recent = st.expander("📝 Recent Transactions", key="recent_open", on_change="rerun")
+    with recent:
+        if recent.open:
+            st.write("Latest entries ...")
+            st.dataframe(summaries.get(RECENT_TRANSACTIONS_TAB, pd.DataFrame()))
+
+@st.fragment
+def transactions_by_month_section():
+    # --- 7. TRANSACTIONS BY MONTH ---
+    # Only the picked months are loaded (just their partitions when reading from Sheets)
+    explorer = st.expander("🗓️ Transactions by Month", key="months_open", on_change="rerun")
+    with explorer:
+        if explorer.open:
+            months = get_available_months()
+            if not months:
+                st.info("No transactions yet.")
+                return
+            if len(months) > 1:
+                start, end = st.select_slider(
+                    "Months", options=months, value=(months[-min(RECENT_MONTHS, len(months))], months[-1]), key="months"
+                )
+                months = months[months.index(start):months.index(end) + 1]
+            table_transactions(months)
+
+with profile_section("get_summaries"):
+    summaries = get_summaries()
+
+if not summaries:
     st.warning("No data found in 'cleaned_data'. Please upload a CSV via the Telegram bot.")
     logger.info("Dashboard displayed with empty state.")
 else:
-    plot_total_spend(df.copy())
-    plot_daily_average_per_category(df.copy())
+    # Every chart reads a small summary table precomputed at upload time.
+    # The headline metrics come first and need nothing else.
+    plot_total_spend(summaries)
     st.divider()
-    plot_total_and_average_per_country(df.copy())
-    st.divider()
-    burn1, burn2 = st.columns([1, 1], gap="small")
-    with burn1:
-        plot_cumulative_burn(df.copy())
-    with burn2:
-        plot_country_comparison_burn(df.copy())
-    st.divider()
-    chart_daily_avg_category_per_country(df.copy())
+    charts_section(summaries)
+
+recent_transactions_section(summaries)
+if summaries:
+    transactions_by_month_section()
 
-# --- 6. RECENT TRANSACTIONS ---
-with st.expander("📝 Recent Transactions"):
-    st.write("Latest entries ...")
-    st.dataframe(df.head(15))
\ No newline at end of file
+render_profile_panel()
@@ -1,46 +1,199 @@
 import os
 import logging
-from processors.file_processor import load_and_process_data
-from services.google_sheet_services import GoogleSheetsService
+import threading
+from processors.file_processor import process_upload, source_size, PIPELINE_VERSION
+from services.google_sheet_services import get_sheets_service
+from services.storage_backends import STORAGE_BACKEND
+from services.cache_service import compute_data_version
+from services import columnar_store, result_cache
+from services.partitioning import PARTITION_BY_MONTH, plan_partition_upload
+from services.tracing import span, trace_run
+from transformations.data_transformations import SUMMARY_PREFIX
 
 logger = logging.getLogger(__name__)
 
 # Constants from Environment
 SPREADSHEET_ID = os.getenv("GOOGLE_SHEET_ID")
 JSON_KEY_PATH = "service_account.json"
+# Append/patch only changed rows instead of clearing and rewriting 'Cleaned_Data'
+INCREMENTAL_UPLOAD = os.getenv("INCREMENTAL_UPLOAD", "true").lower() in ("1", "true", "yes")
 
-def orchestrate_file_process(filepath):
+# Jobs from different chats process in parallel, but publishing touches one global dataset
+# (snapshot manifest, fingerprint index, Sheets tabs, published key), so it runs one job at a time
+_publish_lock = threading.Lock()
+
+def _notify(progress, message):
+    """Sends a stage update through the optional progress callback without ever failing the pipeline."""
+    if progress is None:
+        return
+    try:
+        progress(message)
+    except Exception as e:
+        logger.warning(f"Progress callback failed: {e}")
+
+def orchestrate_file_process(source, progress=None, name=None, run_id=None):
     """
-    Orchestrates the full pipeline:
-    1. Processing raw CSV into multiple DataFrames.
-    2. Uploading each resulting DataFrame to its own tab in Google Sheets.
+    Orchestrates the full pipeline for an export given as a file path, or as the raw
+    bytes of an upload plus its file name (.csv, .csv.gz or .zip):
+    1. Processing raw CSV into multiple DataFrames (skipped for a file identical to the
+       published upload, reused from the on-disk result cache for recent ones).
+    2. Writing an immutable local snapshot (the dashboard's primary read path), which
+       only becomes current once step 4 succeeded.
+    3. Uploading each resulting DataFrame to its own tab in Google Sheets
+       (with PARTITION_BY_MONTH, 'Cleaned_Data' as one tab per changed month).
+    4. Stamping a new data-version token so the dashboard knows to refresh.
+    progress: Optional callable receiving short, user-facing stage messages.
+    Every stage is traced as a span (see services/tracing.py) under one run id;
+    run_id joins a run started earlier, such as the bot's download.
     """
-    # 1. Generate the dictionary of DataFrames
-    sheets_data = load_and_process_data(filepath)
-    
-    if not sheets_data:
-        logger.error("❌ Orchestration aborted: No data returned from processor.")
-        return False
+    name = name or os.path.basename(source)
+    with trace_run(run_id, file=name) as run:
+        run["success"] = _orchestrate(source, name, progress)
+        return run["success"]
+
+def _orchestrate(source, name, progress):
+    # 1. Skip files that were already published, reuse results of recently processed ones
+    with span("result_key", bytes=source_size(source)):
+        key = result_cache.result_key(source, PIPELINE_VERSION, f"incremental={INCREMENTAL_UPLOAD},partitioned={PARTITION_BY_MONTH}")
+    if key == result_cache.read_published_key():
+        logger.info(f"♻️ {name} matches the published upload {key[:12]}. Nothing to do.")
+        _notify(progress, "♻️ This export matches the last upload. Data is already up to date.")
+        return True
+
+    with span("result_cache_load") as trace:
+        processed = result_cache.load_result(key)
+        trace["hit"] = processed is not None
+    if processed is not None:
+        _notify(progress, "♻️ This export was processed recently. Reusing the result.")
+    else:
+        # Generate the canonical frame and the dictionary of DataFrames for Sheets
+        with span("load_and_process_data") as trace:
+            processed = process_upload(source, incremental=INCREMENTAL_UPLOAD, name=name)
+            trace["rows_out"] = len(processed[0]) if processed else 0
+
+        if not processed:
+            logger.error("❌ Orchestration aborted: No data returned from processor.")
+            return False
+
+        try:
+            with span("result_cache_store"):
+                result_cache.store_result(key, *processed)
+        except Exception as e:
+            logger.warning(f"Could not cache the processed result: {e}")
+
+    df_main, sheets_data = processed
+    _notify(progress, f"🧮 Parsed {len(df_main):,} rows.")
+
+    with span("publish_wait"):
+        _publish_lock.acquire()
+    try:
+        return _publish(key, name, df_main, sheets_data, progress)
+    finally:
+        _publish_lock.release()
+
+def _publish(key, name, df_main, sheets_data, progress):
+    """
+    Publishes processed data locally and to Sheets, then stamps its version. Run under _publish_lock.
+    df_main: The canonical frame 'Cleaned_Data' was formatted from, written to the local store as-is.
+    """
+    # Another job may have published the same export while this one was processing
+    if key == result_cache.read_published_key():
+        logger.info(f"♻️ {name} was published by a concurrent job. Nothing to do.")
+        return True
 
-    # 2. Initialize the Google Sheets Service
+    with span("data_version", rows_in=sum(len(df) for df in sheets_data.values())):
+        token, content_hash, timestamp = compute_data_version(sheets_data)
+
+    # 2. Write the local columnar snapshot up front, but only make it current once Sheets
+    #    accepted the new version, so the dashboard and the bot's reply never disagree
+    snapshot_written = False
     try:
-        if not SPREADSHEET_ID:
+        with span("local_store", rows_in=len(df_main)):
+            columnar_store.write_summaries(
+                {name: df for name, df in sheets_data.items() if name.startswith(SUMMARY_PREFIX)}, token
+            )
+            columnar_store.write_snapshot(df_main, token)
+        snapshot_written = True
+    except Exception as e:
+        logger.error(f"❌ Failed to write local snapshot: {str(e)}", exc_info=True)
+
+    committed = False
+    # 3. Get the Google Sheets Service
+    try:
+        if STORAGE_BACKEND != "local" and not SPREADSHEET_ID:
             logger.error("❌ GOOGLE_SHEET_ID is missing in .env")
             return False
 
-        gs_service = GoogleSheetsService(JSON_KEY_PATH, SPREADSHEET_ID)
-        
-        # 3. Iterate through the dictionary and write each sheet
-        logger.info(f"📤 Uploading {len(sheets_data)} tabs to Google Sheets...")
+        # Shared across uploads, so only the first one pays for auth and opening the spreadsheet
+        gs_service = get_sheets_service(JSON_KEY_PATH, SPREADSHEET_ID)
         
-        for sheet_name, df in sheets_data.items():
-            success = gs_service.write_dataframe_to_sheet(df, sheet_name)
-            if not success:
-                logger.warning(f"⚠️ Failed to update sheet: {sheet_name}")
+        # 4. Either publish 'Cleaned_Data' as month partitions, rewriting only the changed ones,
+        #    or as one tab that keeps its incremental path
+        uploads = dict(sheets_data)
+        stale_tabs = []
+        if PARTITION_BY_MONTH:
+            with span("partition_plan"):
+                partition_tabs, stale_tabs = plan_partition_upload(gs_service, uploads.pop("Cleaned_Data"))
+            uploads.update(partition_tabs)
+
+        # 5. Write every tab in one batch. Until the version is stamped nothing counts as published,
+        #    so a failed upload is never mistaken for "already up to date"
+        result_cache.mark_published(None)
+        logger.info(f"📤 Uploading {len(uploads)} tabs to Google Sheets...")
+
+        with span(
+            "sheets_upload",
+            tabs=len(uploads),
+            rows_in=sum(len(df) for df in uploads.values()),
+            cells=sum(df.size for df in uploads.values()),
+        ) as trace:
+            failed = gs_service.write_dataframes_to_sheets(uploads, incremental=INCREMENTAL_UPLOAD)
+            trace["failed_tabs"] = len(failed)
+        _notify(progress, f"📤 Uploaded {len(uploads) - len(failed)}/{len(uploads)} tabs.")
+
+        logger.info(f"📈 Sheets API stats: {gs_service.scheduler.stats()}")
+
+        if failed:
+            logger.warning(f"⚠️ Failed to update sheets: {', '.join(failed)}")
+            _notify(progress, f"⚠️ Google Sheets rejected: {', '.join(failed)}.")
+            logger.error("❌ Upload incomplete. Data version left unchanged.")
+            return False
+
+        # 6. Stamp the data version only after every tab landed
+        with span("sheets_finalize", stale_tabs=len(stale_tabs)) as trace:
+            deleted = not stale_tabs or gs_service.delete_sheets(stale_tabs)
+            stamped = deleted and gs_service.write_data_version(token, content_hash, timestamp)
+            trace["stamped"] = stamped
+        if not stamped:
+            # Left unpublished, so sending the same file again retries instead of short-circuiting
+            logger.error("❌ Could not finalize the upload. Data version left unchanged.")
+            _notify(progress, "⚠️ Google Sheets did not accept the new data version. Please send the file again.")
+            return False
+
+        # 7. Switch the dashboard to the new snapshot together with the published key
+        if snapshot_written:
+            committed = _commit_local_store(token, df_main)
+        result_cache.mark_published(key, token)
 
         logger.info("✅ All sheets updated successfully.")
         return True
 
     except Exception as e:
         logger.error(f"❌ Critical error in file_handler: {str(e)}", exc_info=True)
+        return False
+    finally:
+        if snapshot_written and not committed:
+            columnar_store.discard_snapshot(token)
+
+def _commit_local_store(token, df):
+    """Makes the written snapshot current. Returns False (and logs) if the manifest could not be updated."""
+    try:
+        with span("local_store_commit"):
+            columnar_store.commit_snapshot(token, len(df))
+            changes = columnar_store.compare_to_previous(df)
+        if changes:
+            logger.info(f"📊 Compared to previous upload: {changes}")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Failed to publish local snapshot {token}: {str(e)}", exc_info=True)
         return False
\ No newline at end of file
@@ -0,0 +1,85 @@
+import os
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from handlers.file_handler import orchestrate_file_process
+
+logger = logging.getLogger(__name__)
+
+# Threads rather than processes: the pipeline is dominated by Sheets HTTP calls
+# and needs to hand progress messages back to the bot's event loop.
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "2"))
+MAX_JOBS_PER_CHAT = int(os.getenv("MAX_JOBS_PER_CHAT", "1"))
+MAX_QUEUED_JOBS = int(os.getenv("MAX_QUEUED_JOBS", "10"))
+
+_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+_lock = threading.Lock()
+_active_per_chat = defaultdict(int)
+_running_tasks = set()
+
+
+def _try_reserve(chat_id):
+    """Claims a job slot for the chat. Returns None on success, or the reason it was refused."""
+    with _lock:
+        if _active_per_chat[chat_id] >= MAX_JOBS_PER_CHAT:
+            return "chat"
+        if sum(_active_per_chat.values()) >= MAX_QUEUED_JOBS:
+            return "queue"
+        _active_per_chat[chat_id] += 1
+        return None
+
+
+def _release(chat_id):
+    with _lock:
+        _active_per_chat[chat_id] -= 1
+        if _active_per_chat[chat_id] <= 0:
+            del _active_per_chat[chat_id]
+
+
+async def submit_file_job(bot, chat_id, source, name=None, run_id=None):
+    """
+    Enqueues a file for processing on the worker pool and returns immediately.
+    source: A file path, or the raw bytes of an in-memory upload named `name`.
+    run_id: Trace run the job's spans join (see services/tracing.py), if one was started.
+    Progress and the final result are pushed back to the chat as messages.
+    Returns: None if the job was queued, otherwise a user-facing refusal message.
+    """
+    refusal = _try_reserve(chat_id)
+    if refusal == "chat":
+        return "⏳ You already have an upload being processed. Please wait for it to finish."
+    if refusal == "queue":
+        return "🚦 The processing queue is full right now. Please try again in a minute."
+
+    task = asyncio.create_task(_run_job(bot, chat_id, source, name, run_id))
+    # Keep a reference so the task isn't garbage-collected mid-flight
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+    return None
+
+
+async def _run_job(bot, chat_id, source, name, run_id):
+    loop = asyncio.get_running_loop()
+
+    def progress(message):
+        # Called from the worker thread; schedule the send on the bot's loop
+        asyncio.run_coroutine_threadsafe(bot.send_message(chat_id=chat_id, text=message), loop)
+
+    try:
+        success = await loop.run_in_executor(_executor, orchestrate_file_process, source, progress, name, run_id)
+        if success:
+            await bot.send_message(chat_id=chat_id, text="✅ All data processed and categorized!")
+        else:
+            await bot.send_message(chat_id=chat_id, text="❌ Transformation failed.")
+    except Exception as e:
+        logger.error(f"Pipeline job for chat {chat_id} crashed: {str(e)}", exc_info=True)
+        await bot.send_message(chat_id=chat_id, text="⚠️ An error occurred while processing the file.")
+    finally:
+        _release(chat_id)
+
+
+async def shutdown_job_queue(application=None):
+    """Waits for running jobs to finish. Registered as the bot's post_shutdown hook."""
+    logger.info("Waiting for pipeline jobs to finish...")
+    await asyncio.to_thread(_executor.shutdown, wait=True)
@@ -1,8 +1,11 @@
 import os
+import asyncio
 import logging
 from telegram import Update
 from telegram.ext import ContextTypes
-from handlers.file_handler import orchestrate_file_process
+from handlers.job_queue import submit_file_job
+from processors.file_processor import is_supported_upload
+from services.tracing import span, stage_stats, new_run_id, run_scope
 
 # Standard logging config to capture timestamps and severity levels
 logging.basicConfig(
@@ -11,57 +14,80 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Uploads are parsed straight from memory; set to keep a copy of each one on the volume
+ARCHIVE_UPLOADS = os.getenv("ARCHIVE_UPLOADS", "false").lower() in ("1", "true", "yes")
+DOWNLOAD_DIR = "downloads"
+
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Greets the user and provides instructions."""
     logger.info(f"User {update.effective_user.id} started the bot.")
     await update.message.reply_text(
         "👋 Hello! I'm your Budget Tracker Analytics bot.\n\n"
-        "Send me an **CSV file (.csv)** to begin."
+        "Send me an **CSV file (.csv)** to begin. Compressed exports (.csv.gz or .zip) work too."
     )
 
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Replies with p50/p95 wall time per pipeline stage over recent uploads."""
+    stats = stage_stats()
+    if not stats:
+        await update.message.reply_text("📊 No uploads processed since the bot started.")
+        return
+
+    lines = [f"📊 Pipeline stages over the last {stats.get('total', {}).get('count', 0)} uploads (p50 / p95):"]
+    for stage, values in stats.items():
+        lines.append(f"• {stage}: {values['p50_ms']:,.0f} / {values['p95_ms']:,.0f} ms ({values['count']}x)")
+    await update.message.reply_text("\n".join(lines))
+
+def _archive_upload(file_path, data):
+    if not os.path.exists(DOWNLOAD_DIR):
+        os.makedirs(DOWNLOAD_DIR)
+        logger.info(f"Created '{DOWNLOAD_DIR}' directory.")
+    with open(file_path, "wb") as f:
+        f.write(data)
+
 async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Main handler to validate, download, and save incoming files."""
+    """Main handler to validate and download incoming files, then queue them for processing."""
     document = update.message.document
     file_name = document.file_name
 
-    # 1. Validation: Ensure the file is actually CSV
-    if not (file_name.endswith('.csv')):
+    # 1. Validation: Ensure the file is a CSV export, plain or compressed
+    if not is_supported_upload(file_name):
         logger.warning(f"Invalid file type received: {file_name}")
-        await update.message.reply_text("❌ Error: Please send a valid CSV file (.csv).")
+        await update.message.reply_text("❌ Error: Please send a valid CSV file (.csv, .csv.gz or .zip).")
         return
 
     try:
-        # 2. Inform user and prepare directory
+        # 2. Inform user
         await update.message.reply_text(f"📥 Received: {file_name}. Downloading...")
-        
-        download_dir = "downloads"
-        if not os.path.exists(download_dir):
-            os.makedirs(download_dir)
-            logger.info("Created 'downloads' directory.")
 
-        file_path = os.path.join(download_dir, file_name)
-
-        # 3. Fetch file from Telegram servers
+        # 3. Fetch file from Telegram servers straight into memory
         logger.info(f"Downloading {file_name}...")
-        tg_file = await context.bot.get_file(document.file_id)
-        
-        # 4. Save to the Docker volume path
-        await tg_file.download_to_drive(file_path)
-        
-        logger.info(f"Successfully saved: {file_path}")
-        await update.message.reply_text(f"✅ File saved successfully! Processing will begin.")
-        # Call the orchestrator
-        all_sheet_data = orchestrate_file_process(file_path)
+        # The run starts here so the download span shares its id with the pipeline spans
+        run_id = new_run_id()
+        with run_scope(run_id), span("download", file=file_name, bytes=document.file_size):
+            tg_file = await context.bot.get_file(document.file_id)
+            data = bytes(await tg_file.download_as_bytearray())
+
+        logger.info(f"Successfully downloaded {file_name} ({len(data):,} bytes).")
+
+        # 4. Optionally keep a copy on the Docker volume. Prefixed with Telegram's content id
+        #    so uploads with the same name never overwrite each other
+        if ARCHIVE_UPLOADS:
+            file_path = os.path.join(DOWNLOAD_DIR, f"{document.file_unique_id}_{file_name}")
+            await asyncio.to_thread(_archive_upload, file_path, data)
+            logger.info(f"Archived upload to {file_path}")
+
+        # 5. Hand the bytes to the worker pool so the event loop stays free for other chats
+        refusal = await submit_file_job(context.bot, update.effective_chat.id, data, file_name, run_id)
+        if refusal:
+            await update.message.reply_text(refusal)
+            return None
 
-        if all_sheet_data:
-            await update.message.reply_text("✅ All data processed and categorized!")
-        else:
-            await update.message.reply_text("❌ Transformation failed.")
-            
-            return file_path
+        await update.message.reply_text("✅ File received successfully! Processing has been queued.")
+        return file_name
 
     except Exception as e:
-        # 5. Catch network errors or permission issues
+        # 6. Catch network errors or permission issues
         logger.error(f"Error handling document: {str(e)}", exc_info=True)
         await update.message.reply_text("⚠️ An error occurred while downloading the file. Please try again.")
-        return None
\ No newline at end of file
+        return None
@@ -1,6 +1,11 @@
 import pandas as pd
 import logging
 import os
+import io
+import gzip
+import time
+import zipfile
+from contextlib import contextmanager, ExitStack
 from datetime import date, timedelta
 
 # Set up logger for this specific module
@@ -9,37 +14,150 @@ logger = logging.getLogger(__name__)
 # Import the transformation logic
 from transformations.data_transformations import (
     process_main_data, 
+    fingerprint_transactions,
+    format_for_sheets,
+    concat_canonical,
+    build_spend_cube,
+    build_summaries,
+    CSV_SCHEMA,
 )
+from services.tracing import span, record_span
 
-def load_csv_file(filepath):
-    """Reads the CSV from disk with error handling."""
-    if not os.path.exists(filepath):
-        logger.error(f"❌ File not found: {filepath}")
+# Rows per chunk when streaming the export; bounds peak memory for multi-year files
+CSV_CHUNK_SIZE = int(os.getenv("CSV_CHUNK_SIZE", "100000"))
+# Bump whenever cleaning or summary logic changes, so cached results of earlier uploads are recomputed
+PIPELINE_VERSION = "1"
+
+# Upload formats the bot accepts; compressed ones are decompressed as a stream while parsing
+SUPPORTED_SUFFIXES = ('.csv', '.csv.gz', '.zip')
+
+def is_supported_upload(name):
+    return name.lower().endswith(SUPPORTED_SUFFIXES)
+
+def source_size(source):
+    """Size in bytes of an export given as a path or as the raw bytes of an upload."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    return len(source)
+
+@contextmanager
+def open_csv_source(source, name=None):
+    """
+    Opens an export as a binary CSV stream without touching the disk for in-memory uploads.
+    source: A file path, or the raw bytes of an upload.
+    name: File name deciding the format (defaults to the path). '.gz' is gunzipped and
+    '.zip' yields its first '.csv' member, both decompressed as they are read.
+    """
+    is_path = isinstance(source, (str, os.PathLike))
+    name = str(name or (source if is_path else "")).lower()
+    with ExitStack() as stack:
+        raw = stack.enter_context(open(source, "rb") if is_path else io.BytesIO(source))
+        if name.endswith(".gz"):
+            yield stack.enter_context(gzip.GzipFile(fileobj=raw))
+        elif name.endswith(".zip"):
+            archive = stack.enter_context(zipfile.ZipFile(raw))
+            members = [
+                member for member in archive.namelist()
+                if member.lower().endswith(".csv") and not member.startswith("__MACOSX/")
+            ]
+            if not members:
+                raise ValueError(f"No .csv file found inside {name}")
+            yield stack.enter_context(archive.open(members[0]))
+        else:
+            yield raw
+
+def _missing_file(source):
+    if isinstance(source, (str, os.PathLike)) and not os.path.exists(source):
+        logger.error(f"❌ File not found: {source}")
+        return True
+    return False
+
+def _read_csv(handle, **kwargs):
+    """pd.read_csv restricted to the known schema columns with explicit dtypes."""
+    return pd.read_csv(
+        handle,
+        usecols=lambda col: col in CSV_SCHEMA,
+        dtype=CSV_SCHEMA,
+        **kwargs
+    )
+
+def load_csv_file(source, name=None):
+    """Reads the CSV from a path or in-memory upload (see open_csv_source) with error handling."""
+    if _missing_file(source):
         return None
 
     try:
-        df = pd.read_csv(filepath)
+        with open_csv_source(source, name) as handle:
+            df = _read_csv(handle)
         logger.info(f"✅ Successfully read CSV with {len(df)} raw rows.")
         return df
     except Exception as e:
         logger.error(f"❌ Failed to parse CSV: {str(e)}")
         return None
 
-def load_and_process_data(filepath):
+def load_and_clean_csv_chunks(source, chunksize=CSV_CHUNK_SIZE, name=None):
+    """
+    Streams the CSV in chunks and cleans each one through process_main_data,
+    so only the cleaned columns of the whole export are ever held in memory.
+    source/name: A path or in-memory upload, as for open_csv_source.
+    Returns: The concatenated cleaned DataFrame, or None on failure.
+    """
+    if _missing_file(source):
+        return None
+
+    try:
+        cleaned_chunks = []
+        raw_rows = 0
+        # Reading and cleaning interleave per chunk, so their times are summed separately
+        read_s = clean_s = 0.0
+        with open_csv_source(source, name) as handle, _read_csv(handle, chunksize=chunksize) as reader:
+            start = time.perf_counter()
+            for chunk in reader:
+                read_s += time.perf_counter() - start
+                raw_rows += len(chunk)
+                start = time.perf_counter()
+                cleaned = process_main_data(chunk)
+                clean_s += time.perf_counter() - start
+                if cleaned is None:
+                    return None
+                cleaned_chunks.append(cleaned)
+                start = time.perf_counter()
+
+        logger.info(f"✅ Streamed CSV with {raw_rows} raw rows in {len(cleaned_chunks)} chunks.")
+        record_span("read_csv", read_s, rows_out=raw_rows, bytes=source_size(source), chunks=len(cleaned_chunks))
+        if not cleaned_chunks:
+            return None
+        df = concat_canonical(cleaned_chunks)
+        record_span("process_main_data", clean_s, rows_in=raw_rows, rows_out=len(df))
+        return df
+    except Exception as e:
+        logger.error(f"❌ Failed to parse CSV: {str(e)}")
+        return None
+
+def load_and_process_data(source, incremental=False, name=None):
     """
     Public entry point: Coordinates the loading, transforming, and packaging of data.
+    source: Path to the export, or the raw bytes of an upload together with its file
+    name (.csv, .csv.gz or .zip).
+    With incremental=True, 'Cleaned_Data' gets a trailing 'Fingerprint' column so the
+    sheet writer can append/patch only the rows that changed.
     Returns: A dictionary of DataFrames/Series ready for Google Sheets, or None.
     """
-    logger.info(f"🚀 Starting orchestration for: {filepath}")
-    
-    # 1. Load the raw data from disk
-    df_raw = load_csv_file(filepath)
-    if df_raw is None:
-        return None
+    processed = process_upload(source, incremental=incremental, name=name)
+    return processed[1] if processed else None
 
+def process_upload(source, incremental=False, name=None):
+    """
+    Same as load_and_process_data, but also hands back the canonical cleaned frame
+    (categoricals, datetime64, int64 cents) the Sheets tabs were formatted from, so the
+    local columnar store can write it as-is.
+    Returns: (canonical DataFrame, dictionary of DataFrames for Google Sheets), or None.
+    """
+    logger.info(f"🚀 Starting orchestration for: {name or (source if isinstance(source, str) else 'in-memory upload')}")
+    
     try:
-        # 2. Initial Clean (The "Master" DataFrame)
-        df_main = process_main_data(df_raw)
+        # 1 & 2. Stream the raw data and clean it chunk by chunk (The "Master" DataFrame)
+        df_main = load_and_clean_csv_chunks(source, name=name)
         
         if df_main is None or df_main.empty:
             logger.error("❌ process_main_data returned empty. Aborting transformations.")
@@ -51,14 +169,25 @@ def load_and_process_data(filepath):
         sheet_data = {
             "Cleaned_Data": df_main.copy(),
     }
+        # Small precomputed summary tabs, so the dashboard never scans raw transactions.
+        # Every summary is derived from one spend cube aggregated once here.
+        with span("summaries", rows_in=len(df_main)) as trace:
+            cube = build_spend_cube(df_main)
+            sheet_data.update(build_summaries(df_main, cube=cube))
+            trace["cube_cells"] = len(cube)
+
+        # 4. Final Formatting: Dates to strings, cents to currency units, categoricals to text
+        # We do this LAST so the calculation functions above could still use the canonical types
+        with span("format_for_sheets", rows_in=len(df_main), tabs=len(sheet_data)):
+            for sheet_name in sheet_data:
+                sheet_data[sheet_name] = format_for_sheets(sheet_data[sheet_name])
 
-        # 4. Final Formatting: Convert Date objects to strings for Google Sheets JSON
-        # We do this LAST so the calculation functions above could still use datetime math
-        if "Cleaned_Data" in sheet_data:
-            sheet_data["Cleaned_Data"]['Date'] = sheet_data["Cleaned_Data"]['Date'].dt.strftime('%Y-%m-%d')
+            # 5. Incremental mode: tag each transaction with its fingerprint
+            if incremental:
+                sheet_data["Cleaned_Data"]['Fingerprint'] = fingerprint_transactions(sheet_data["Cleaned_Data"])
 
         logger.info("✅ Orchestration complete. Data ready for Google Sheets.")
-        return sheet_data
+        return df_main, sheet_data
 
     except Exception as e:
         logger.error(f"❌ Critical error during data orchestration: {str(e)}", exc_info=True)
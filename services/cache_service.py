@@ -0,0 +1,115 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def compute_data_version(sheets_data):
+    """
+    Builds a data-version token for a dictionary of DataFrames.
+    The token is '<content hash>@<UTC timestamp>', so two uploads of identical
+    content still share the hash part while every publish gets a fresh token.
+    Returns: (token, content_hash, timestamp)
+    """
+    digest = hashlib.sha256()
+    for sheet_name in sorted(sheets_data):
+        df = sheets_data[sheet_name]
+        digest.update(sheet_name.encode("utf-8"))
+        digest.update("|".join(map(str, df.columns)).encode("utf-8"))
+        # Row hashes are vectorised, so this stays cheap even for large tabs
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+
+    content_hash = digest.hexdigest()[:16]
+    timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    return f"{content_hash}@{timestamp}", content_hash, timestamp
+
+
+class VersionedCache:
+    """
+    Holds a single value tied to a data-version token.
+    The value is served until the token changes; hits and misses are counted
+    so the dashboard can report how effective the cache is.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.version = None
+        self.value = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, version):
+        """Returns the cached value if it matches the version, otherwise None."""
+        with self._lock:
+            if version is not None and version == self.version:
+                self.hits += 1
+                return self.value
+            self.misses += 1
+            return None
+
+    def put(self, version, value):
+        with self._lock:
+            self.version = version
+            self.value = value
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "cache": self.name,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+class LRUCache:
+    """
+    Holds up to max_entries values by key, evicting the least recently used.
+    Keys should include the data-version token so stale entries age out on
+    their own; hits, misses and evictions are counted like VersionedCache.
+    """
+
+    def __init__(self, name, max_entries):
+        self.name = name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached value for key, otherwise None."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "cache": self.name,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,219 @@
+import os
+import json
+import logging
+import uuid
+import shutil
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow.feather as feather
+from services.fingerprint_index import FINGERPRINT_COL
+from transformations.data_transformations import apply_canonical_schema, cents_to_currency, CATEGORICAL_COLS
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.getenv("DATA_DIR", "data")
+STORE_DIR = os.path.join(DATA_DIR, "store")
+SNAPSHOT_DIR = os.path.join(STORE_DIR, "snapshots")
+SUMMARY_DIR = os.path.join(STORE_DIR, "summaries")
+MANIFEST_PATH = os.path.join(STORE_DIR, "manifest.json")
+# Number of immutable snapshots kept on the volume before the oldest are pruned
+SNAPSHOT_RETENTION = int(os.getenv("SNAPSHOT_RETENTION", "10"))
+
+# Serialises read-modify-write cycles of the manifest between concurrent pipeline jobs
+_manifest_lock = threading.Lock()
+
+
+def _read_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {"snapshots": []}
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable manifest {MANIFEST_PATH}: {e}")
+        return {"snapshots": []}
+
+
+def _tmp_path(path):
+    # Unique per writer, so concurrent jobs never write into each other's temporary file
+    return f"{path}.{uuid.uuid4().hex}.tmp"
+
+
+def _write_manifest(manifest):
+    tmp_path = _tmp_path(MANIFEST_PATH)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    # Readers either see the old manifest or the new one, never a partial file
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def _safe_version(version):
+    return "".join(c if c.isalnum() else "_" for c in version)
+
+
+def _snapshot_filename(version):
+    return "cleaned_data-" + _safe_version(version) + ".feather"
+
+
+def write_snapshot(df, version):
+    """
+    Writes the canonical cleaned dataset (as process_upload returns it) as an immutable,
+    uncompressed Feather (Arrow IPC) file. Uncompressed so readers can memory-map it.
+    The canonical dtypes (categoricals, datetime64, int64 cents) are stored as-is, so
+    neither the writer nor read_snapshot recasts a column.
+    The snapshot is not current until commit_snapshot; drop it with discard_snapshot
+    if the version never gets published.
+    Returns: The snapshot path.
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    path = os.path.join(SNAPSHOT_DIR, _snapshot_filename(version))
+
+    tmp_path = _tmp_path(path)
+    feather.write_feather(df, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+    logger.info(f"💾 Wrote snapshot {version} with {len(df)} rows to {path}.")
+    return path
+
+
+def _remove_version_files(version, filename):
+    try:
+        os.remove(os.path.join(SNAPSHOT_DIR, filename))
+    except OSError:
+        pass
+    shutil.rmtree(os.path.join(SUMMARY_DIR, _safe_version(version)), ignore_errors=True)
+
+
+def commit_snapshot(version, rows):
+    """Makes a snapshot written by write_snapshot (and its summaries) the current one."""
+    path = os.path.join(SNAPSHOT_DIR, _snapshot_filename(version))
+    with _manifest_lock:
+        expired = _register_snapshot(version, path, rows)
+    for snapshot in expired:
+        _remove_version_files(snapshot["version"], snapshot["file"])
+    logger.info(f"💾 Snapshot {version} is now current.")
+
+
+def discard_snapshot(version):
+    """Deletes the files of a snapshot that was written but never committed."""
+    with _manifest_lock:
+        if any(s["version"] == version for s in _read_manifest()["snapshots"]):
+            return
+        _remove_version_files(version, _snapshot_filename(version))
+    logger.info(f"🗑️ Discarded unpublished snapshot {version}.")
+
+
+def _register_snapshot(version, path, rows):
+    """Makes a written snapshot current in the manifest. Returns: The entries pruned from it."""
+    manifest = _read_manifest()
+    manifest["snapshots"] = [s for s in manifest["snapshots"] if s["version"] != version]
+    manifest["snapshots"].append({
+        "version": version,
+        "file": os.path.basename(path),
+        "rows": rows,
+        "created": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+    })
+
+    # Prune the oldest snapshots beyond the retention window
+    expired = manifest["snapshots"][:-SNAPSHOT_RETENTION]
+    manifest["snapshots"] = manifest["snapshots"][-SNAPSHOT_RETENTION:]
+    _write_manifest(manifest)
+    return expired
+
+
+def write_summaries(summaries, version):
+    """
+    Stores the precomputed summary tables for a version as small Feather artifacts.
+    Call before write_snapshot so readers never see a snapshot without its summaries.
+    """
+    target = os.path.join(SUMMARY_DIR, _safe_version(version))
+    tmp_target = f"{target}.tmp"
+    shutil.rmtree(tmp_target, ignore_errors=True)
+    os.makedirs(tmp_target)
+    for name, df in summaries.items():
+        feather.write_feather(df.reset_index(drop=True), os.path.join(tmp_target, f"{name}.feather"))
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp_target, target)
+    logger.info(f"💾 Wrote {len(summaries)} summary artifacts for {version}.")
+
+
+def read_summaries(version):
+    """Returns the summary tables stored for a version as a dict, or None if there are none."""
+    target = os.path.join(SUMMARY_DIR, _safe_version(version))
+    if not os.path.isdir(target):
+        return None
+    try:
+        return {
+            filename[:-len(".feather")]: feather.read_feather(os.path.join(target, filename))
+            for filename in sorted(os.listdir(target)) if filename.endswith(".feather")
+        }
+    except Exception as e:
+        logger.error(f"Error reading summaries for {version}: {e}")
+        return None
+
+
+def read_current_version():
+    """Returns the version token of the current snapshot, or None if the store is empty."""
+    snapshots = _read_manifest()["snapshots"]
+    return snapshots[-1]["version"] if snapshots else None
+
+
+def _is_canonical(df):
+    return (
+        df['Date'].dtype == 'datetime64[s]'
+        and df['Amount'].dtype == 'int64'
+        and all(isinstance(df[col].dtype, pd.CategoricalDtype) for col in CATEGORICAL_COLS if col in df.columns)
+    )
+
+
+def read_snapshot(version=None):
+    """
+    Memory-maps a snapshot and returns it as a DataFrame whose columns are read-only
+    views over the mapped file (dates, cents and category codes are not copied).
+    Defaults to the current snapshot. Returns None if it doesn't exist.
+    """
+    snapshots = _read_manifest()["snapshots"]
+    if version is not None:
+        snapshots = [s for s in snapshots if s["version"] == version]
+    if not snapshots:
+        return None
+
+    path = os.path.join(SNAPSHOT_DIR, snapshots[-1]["file"])
+    try:
+        table = feather.read_table(path, memory_map=True)
+        # split_blocks keeps each column its own zero-copy block; self_destruct drops
+        # the Arrow table as it is converted, so table must not be used afterwards
+        df = table.to_pandas(self_destruct=True, split_blocks=True)
+        del table
+        if FINGERPRINT_COL in df.columns or not _is_canonical(df):
+            # Snapshots written before the canonical schema are upgraded in memory
+            df = apply_canonical_schema(df.drop(columns=[FINGERPRINT_COL], errors="ignore"))
+        return df
+    except Exception as e:
+        logger.error(f"Error reading snapshot {path}: {e}")
+        return None
+
+
+def read_previous_snapshot():
+    """Returns the snapshot published before the current one, or None."""
+    snapshots = _read_manifest()["snapshots"]
+    if len(snapshots) < 2:
+        return None
+    return read_snapshot(snapshots[-2]["version"])
+
+
+def compare_to_previous(df):
+    """Summarises how a canonical dataset differs from the previous snapshot (rows and total spend)."""
+    previous = read_previous_snapshot()
+    if previous is None:
+        return None
+
+    return {
+        "rows": len(df),
+        "rows_delta": len(df) - len(previous),
+        "amount": round(float(cents_to_currency(df['Amount'].sum())), 2),
+        "amount_delta": round(float(cents_to_currency(df['Amount'].sum() - previous['Amount'].sum())), 2),
+    }
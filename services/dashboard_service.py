@@ -2,16 +2,25 @@ import os
 import pandas as pd
 import numpy as np
 import logging
-from services.google_sheet_services import GoogleSheetsService
+from services.google_sheet_services import get_sheets_service, SheetsRequestError
+from services.cache_service import VersionedCache, LRUCache
+from services import columnar_store
+from services.partitioning import PARTITION_BY_MONTH, PARTITION_INDEX_TAB, read_partitions
+from services.render_profiler import profiled, note, note_figure, current_profile
+import time
 import streamlit as st
 import plotly.express as px
+import plotly.io as pio
 
 from transformations.data_transformations import (
-    calculate_daily_avg_category_per_country,
-    calculate_daily_average_per_category,
-    calculate_average_daily_budget_per_country,
-    calculate_total_spend_per_country,
-    calculate_cumulative_spend_per_country_by_day
+    apply_canonical_schema,
+    cents_to_currency,
+    build_spend_cube,
+    build_summaries,
+    format_for_sheets,
+    ANALYSIS_COLS,
+    SUMMARY_BUILDERS,
+    RECENT_TRANSACTIONS_TAB,
 )
 
 # --- LOGGING SETUP ---
@@ -26,87 +35,441 @@ SPREADSHEET_ID = os.getenv("GOOGLE_SHEET_ID")
 JSON_KEY_PATH = "service_account.json"
 
 TOTAL_BUDGET = 20000 
-
-
-# Initialize Service
-try:
-    service = GoogleSheetsService(JSON_KEY_PATH, SPREADSHEET_ID)
-    logger.info("GoogleSheetsService initialized successfully.")
-except Exception as e:
-    logger.error(f"Failed to initialize GoogleSheetsService: {e}")
-    st.error("Configuration Error: Check your service account key and Sheet ID.")
-
-#@st.cache_data(ttl=600)
-def get_data():
-    logger.info("Attempting to fetch data from Google Sheets...")
+# Built Plotly figures kept per (data version, chart, params); six charts per version
+FIGURE_CACHE_SIZE = int(os.getenv("FIGURE_CACHE_SIZE", "32"))
+# Rendered width of a time-series chart; each chart is downsampled to one point per pixel.
+# The burn charts share a row in the centered layout, so each gets about half of it.
+CHART_WIDTH_PX = int(os.getenv("CHART_WIDTH_PX", "350"))
+# Months the transactions view opens on; older ones are only read when picked
+RECENT_MONTHS = int(os.getenv("DASHBOARD_RECENT_MONTHS", "2"))
+# Fewest points a downsampled trace keeps (LTTB needs its first, last and one bucket point)
+MIN_TRACE_POINTS = 3
+
+
+@st.cache_resource
+def _sheets_service():
+    return get_sheets_service(JSON_KEY_PATH, SPREADSHEET_ID)
+
+def get_service():
+    """
+    Returns the shared Sheets service, held as a Streamlit cached resource so every
+    session and rerun reuses one authenticated client. Nothing connects at import.
+    """
     try:
-        df = service.read_sheet_to_dataframe("Cleaned_Data")
+        return _sheets_service()
+    except Exception as e:
+        logger.error(f"Failed to initialize GoogleSheetsService: {e}")
+        st.error("Configuration Error: Check your service account key and Sheet ID.")
+        raise
+
+# Parsed 'Cleaned_Data' kept in memory until the bot stamps a new data version.
+# Module state survives Streamlit reruns, so every viewer shares this cache.
+data_cache = VersionedCache("Cleaned_Data")
+cube_cache = VersionedCache("Spend_Cube")
+summary_cache = VersionedCache("Summaries")
+month_cache = VersionedCache("Months")
+# Month partitions read from Sheets, per (data version, months); the full frame isn't loaded for them
+partition_cache = LRUCache("Partitions", 8)
+figure_cache = LRUCache("Figures", FIGURE_CACHE_SIZE)
+
+def _current_version():
+    """
+    Cheap version check: the local snapshot manifest, else a single-cell read in Sheets.
+    Returns: (version, is_local)
+    """
+    local_version = columnar_store.read_current_version()
+    if local_version is not None:
+        return local_version, True
+    return get_service().read_data_version(), False
+
+def _select_months(df, months):
+    """Rows of the canonical frame falling in the given 'YYYY-MM' months."""
+    if months is None or df.empty:
+        return df
+    wanted = pd.to_datetime(sorted(months), format='%Y-%m').values.astype('datetime64[M]')
+    return df[np.isin(df['Date'].values.astype('datetime64[M]'), wanted)]
+
+def _read_months(version, months):
+    """
+    Reads only the given month partitions from Sheets, cached per data version and months.
+    Returns: The canonical rows, or None if no partition index exists.
+    """
+    key = (version, tuple(sorted(months)))
+    df = partition_cache.get(key) if version is not None else None
+    if df is not None:
+        return df
+    df = read_partitions(get_service(), ANALYSIS_COLS, months)
+    if df is None:
+        return None
+    df = apply_canonical_schema(df)
+    if version is not None:
+        partition_cache.put(key, df)
+    return df
+
+def get_data(months=None):
+    """
+    Returns the canonical transactions for the current data version.
+    months: Optional list of 'YYYY-MM' months to limit the rows to. With month
+    partitions in Sheets only those partitions are read (and not cached), so
+    recent-period views stay fast however long the trip history gets.
+    """
+    try:
+        # 1. Cheap check of the current data version
+        version, is_local = _current_version()
+        df = data_cache.get(version)
+        if df is not None:
+            logger.info(f"Data cache hit for version {version}. {data_cache.stats()}")
+            note(cache="hit")
+            return _select_months(df, months)
+        note(cache="miss", source="local snapshot" if is_local else "sheets")
+
+        # 2. Version changed (or unknown): memory-map the local snapshot, or re-read from Sheets
+        if is_local:
+            logger.info(f"Loading local snapshot {version}...")
+            df = columnar_store.read_snapshot(version)
+        if df is None:
+            logger.info("Attempting to fetch data from Google Sheets...")
+            if PARTITION_BY_MONTH and months is not None:
+                recent = _read_months(version, months)
+                if recent is not None:
+                    return recent
+            elif PARTITION_BY_MONTH:
+                df = read_partitions(get_service(), ANALYSIS_COLS)
+            if df is None:
+                df = get_service().read_columns_to_dataframe("Cleaned_Data", ANALYSIS_COLS)
+            if not df.empty:
+                # Sheets hands back text dates and currency amounts; restore the canonical dtypes
+                df = apply_canonical_schema(df)
+        # Fingerprints only matter to the incremental writer
+        df = df.drop(columns=["Fingerprint"], errors="ignore")
         if df.empty:
             logger.warning("Dataframe returned is empty.")
         else:
             logger.info(f"Successfully loaded {len(df)} rows.")
-        return df
+            # Without a version token there is nothing to invalidate on, so don't cache
+            if version is not None:
+                df.attrs["data_version"] = version
+                data_cache.put(version, df)
+        logger.info(f"Data cache miss for version {version}. {data_cache.stats()}")
+        return _select_months(df, months)
+    except SheetsRequestError as e:
+        # Don't let an outage look like an empty dataset
+        logger.error(f"Google Sheets unavailable in get_data: {e}")
+        st.error("Google Sheets is not responding right now (rate limit or outage). Please refresh in a minute.")
+        return pd.DataFrame()
     except Exception as e:
         logger.error(f"Error in get_data: {e}")
         return pd.DataFrame()
 
-def chart_daily_avg_category_per_country(df):
-    chart_data = calculate_daily_avg_category_per_country(df)
+def get_available_months():
+    """
+    'YYYY-MM' months with transactions in the current data version, oldest first.
+    With month partitions in Sheets (and no local snapshot) only the index tab is read.
+    """
+    try:
+        version, is_local = _current_version()
+        months = month_cache.get(version)
+        if months is not None:
+            return months
+
+        if PARTITION_BY_MONTH and not is_local:
+            index = get_service().read_sheet_to_dataframe(PARTITION_INDEX_TAB)
+            if not index.empty:
+                months = sorted(index['Partition'].astype(str))
+        if months is None:
+            df = get_data()
+            dates = df['Date'].dropna().values.astype('datetime64[M]') if not df.empty else []
+            months = np.unique(dates).astype(str).tolist()
+        if version is not None:
+            month_cache.put(version, months)
+        return months
+    except Exception as e:
+        logger.error(f"Error in get_available_months: {e}")
+        return []
+
+def get_spend_cube(df):
+    """Returns the Country x Category x Day cube for the data, built once per data version."""
+    version = df.attrs.get("data_version")
+    cube = cube_cache.get(version)
+    if cube is not None:
+        return cube
+
+    cube = build_spend_cube(df)
+    if version is not None:
+        cube_cache.put(version, cube)
+    logger.info(f"Spend cube rebuilt for version {version}. {cube_cache.stats()}")
+    return cube
+
+def get_summaries():
+    """
+    Returns the precomputed summary tables for the current data version, so charts
+    only ever touch a few hundred rows. Read order: local Feather artifacts, then the
+    Summary_* tabs in one batched Sheets read, and only as a last resort rebuilt from
+    the raw transactions. Every path returns the same Sheets-formatted tables.
+    """
+    try:
+        version, is_local = _current_version()
+        summaries = summary_cache.get(version)
+        if summaries is not None:
+            logger.info(f"Summary cache hit for version {version}. {summary_cache.stats()}")
+            note(cache="hit")
+            return summaries
+        note(cache="miss", source="local artifacts" if is_local else "sheets")
+
+        summaries = None
+        if is_local:
+            summaries = columnar_store.read_summaries(version)
+        else:
+            summaries = get_service().read_sheets_to_dataframes(list(SUMMARY_BUILDERS) + [RECENT_TRANSACTIONS_TAB])
+
+        if not summaries:
+            # Data published before summaries existed: derive them once per version
+            logger.info("No precomputed summaries found. Building them from raw transactions...")
+            df = get_data()
+            summaries = {}
+            if not df.empty:
+                built = build_summaries(df, cube=get_spend_cube(df))
+                summaries = {name: format_for_sheets(table) for name, table in built.items()}
+
+        if summaries and version is not None:
+            # Charts key their cached figures on this
+            for table in summaries.values():
+                table.attrs["data_version"] = version
+            summary_cache.put(version, summaries)
+        logger.info(f"Summary cache miss for version {version}. {summary_cache.stats()}")
+        return summaries
+    except SheetsRequestError as e:
+        logger.error(f"Google Sheets unavailable in get_summaries: {e}")
+        st.error("Google Sheets is not responding right now (rate limit or outage). Please refresh in a minute.")
+        return {}
+    except Exception as e:
+        logger.error(f"Error in get_summaries: {e}")
+        return {}
+
+def _summary(summaries, name):
+    """Returns one summary table, or an empty DataFrame if it wasn't published."""
+    return summaries.get(name, pd.DataFrame())
+
+def _summaries_version(summaries):
+    """Data version the summary tables were loaded for, or None if unknown."""
+    for table in summaries.values():
+        return table.attrs.get("data_version")
+    return None
+
+def cached_figure(chart_id, builder, summaries, **params):
+    """
+    Returns the figure for a chart, built at most once per (data version, chart id, params).
+    Warm reruns only look the figure up; Streamlit copies it when serializing, so
+    the cached object is never mutated and can be shared between sessions.
+    """
+    version = _summaries_version(summaries)
+    key = (version, chart_id, tuple(sorted(params.items())))
+    fig = figure_cache.get(key)
+    if fig is not None:
+        note_figure(chart_id, cache="hit")
+        return fig
+
+    start = time.perf_counter()
+    fig = builder(summaries, **params)
+    # Without a version token there is nothing to invalidate on, so don't cache
+    if version is not None:
+        figure_cache.put(key, fig)
+    note_figure(chart_id, cache="miss", build_ms=round((time.perf_counter() - start) * 1000, 1))
+    logger.info(f"Figure '{chart_id}' built for version {version}. {figure_cache.stats()}")
+    return fig
+
+def render_chart(chart_id, fig, **kwargs):
+    """
+    st.plotly_chart, timed for the render profile. While profiling, the figure is also
+    serialized once more to report the payload size sent to the browser.
+    """
+    if current_profile() is None:
+        st.plotly_chart(fig, **kwargs)
+        return
+    start = time.perf_counter()
+    st.plotly_chart(fig, **kwargs)
+    note_figure(
+        chart_id,
+        render_ms=round((time.perf_counter() - start) * 1000, 1),
+        payload_kb=round(len(pio.to_json(fig, validate=False)) / 1024, 1),
+    )
+
+def _numeric_x(values):
+    """X values as floats for the triangle areas (dates become epoch seconds)."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    return pd.to_datetime(values).to_numpy(dtype="datetime64[s]").astype(float)
+
+def lttb_indices(x, y, max_points):
+    """
+    Largest-Triangle-Three-Buckets: picks max_points indices of a series sorted by x
+    that keep its visual shape. The first and last points are always kept; every
+    bucket in between contributes the point forming the largest triangle with the
+    previously kept point and the average of the next bucket.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (max_points - 2)
+    bounds = (np.arange(max_points - 1) * every).astype(int) + 1
+    bounds[-1] = n - 1
+    # Bucket averages don't depend on the selection, so compute them in one pass;
+    # the last "bucket" is the final point
+    counts = np.diff(np.append(bounds, n))
+    avg_x = (np.add.reduceat(x, bounds) / counts).tolist()
+    avg_y = (np.add.reduceat(y, bounds) / counts).tolist()
+
+    # Daily series are a few thousand points, where plain floats beat per-bucket numpy calls
+    xs, ys = x.tolist(), y.tolist()
+    selected = [0]
+    a = 0
+    for i in range(max_points - 2):
+        ax, ay = xs[a], ys[a]
+        dx, dy = avg_x[i + 1] - ax, avg_y[i + 1] - ay
+        best, best_area = bounds[i], -1.0
+        for j in range(bounds[i], bounds[i + 1]):
+            area = abs(dx * (ys[j] - ay) - (xs[j] - ax) * dy)
+            if area > best_area:
+                best, best_area = j, area
+        a = int(best)
+        selected.append(a)
+    selected.append(n - 1)
+    return np.array(selected)
+
+def _keep_positions(x, y, max_points, level=None):
+    """
+    At most max_points positions of one trace: its LTTB points plus the points either side
+    of its first crossing of level. Below MIN_TRACE_POINTS only the end points are kept.
+    """
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    crossing = []
+    if level is not None:
+        above = np.flatnonzero(y >= level)
+        if len(above):
+            crossing = [above[0] - 1, above[0]] if above[0] > 0 else [above[0]]
+    crossing = crossing[max(len(crossing) - max_points, 0):]
+    rest = max_points - len(crossing)
+    if rest >= MIN_TRACE_POINTS:
+        picks = lttb_indices(x, y, rest)
+    else:
+        picks = np.array([0, n - 1][:rest], dtype=int)
+    return np.union1d(picks, crossing).astype(int)
+
+def _trace_budgets(sizes, max_points):
+    """
+    Splits max_points across traces of the given lengths without ever exceeding it.
+    Traces of at most MIN_TRACE_POINTS stay whole when they fit. The others share the
+    rest in proportion to their length, at least MIN_TRACE_POINTS each (or an even
+    split of what is left when even that doesn't fit).
+    """
+    budgets = sizes.copy()
+    pending = sizes > MIN_TRACE_POINTS
+    left = max_points - sizes[~pending].sum()
+    if left < 0:
+        # Too many short traces to keep them all whole: every trace shares the budget
+        pending[:] = True
+        left = max_points
+    floor = min(MIN_TRACE_POINTS, left // max(pending.sum(), 1))
+    # Traces whose proportional share falls below the floor get the floor and leave the pool
+    while pending.any():
+        rows = np.flatnonzero(pending)
+        share = left * sizes[rows] // sizes[rows].sum()
+        short = share < floor
+        if not short.any():
+            budgets[rows] = share
+            break
+        budgets[rows[short]] = floor
+        left -= floor * short.sum()
+        pending[rows[short]] = False
+    return np.minimum(budgets, sizes)
+
+def downsample_series(df, x, y, max_points, level=None, group=None):
+    """
+    Caps a line chart at max_points rows in total with LTTB. Rows must be sorted by
+    x (within each group). With `level`, the points either side of the first crossing
+    of that value are kept, so a threshold line is crossed exactly where the full
+    series crosses it. `group` splits the budget across traces (see _trace_budgets)
+    and downsamples each separately.
+    """
+    if max_points is None or len(df) <= max_points:
+        return df
+
+    xs = _numeric_x(df[x])
+    ys = pd.to_numeric(df[y]).to_numpy(dtype=float)
+    traces = [np.arange(len(df))] if group is None else list(df.groupby(group, sort=False, observed=True).indices.values())
+    sizes = np.array([len(rows) for rows in traces])
+    budgets = _trace_budgets(sizes, max_points)
+    keep = np.concatenate([
+        rows[_keep_positions(xs[rows], ys[rows], budget, level)] for rows, budget in zip(traces, budgets)
+    ])
+    return df.iloc[np.sort(keep)]
+
+def build_daily_avg_category_per_country_figure(summaries):
+    chart_data = _summary(summaries, "Summary_Daily_Avg_Category_Per_Country")
+
+    # Create the Horizontal Grouped Bar Chart
+    fig = px.bar(
+        chart_data,
+        x="Daily_Avg",       # Swapped to x
+        y="Category",        # Swapped to y
+        color="Country",
+        orientation='h',     # Added for horizontal orientation
+        barmode="group",
+        text="Daily_Avg",
+        title="How much am I spending per day in each country?",
+        labels={"Daily_Avg": "Avg Daily Spend (€)", "Category": "Expense Type"},
+        template="plotly_dark"
+    )
+
+    # Style the numbers to the right of the bars
+    fig.update_traces(textposition='outside', texttemplate='%{text:.2f}')
+    fig.update_layout(uniformtext_minsize=8, uniformtext_mode='hide')
+    fig.update_layout(
+        legend_title_text="",
+        legend=dict(
+        orientation="h",
+        yanchor="top",
+        y=-0.3,            # Pulls it further down away from the X-axis
+        xanchor="center",
+        x=0.5,
+        entrywidth=70,     # Forces items to have specific widths to prevent overlap
+        entrywidthmode="pixels",
+        title=""
+    ),
+        uniformtext_minsize=8, 
+        uniformtext_mode='hide',
+        dragmode=False
+    )
+    
+    
+    # 1. Lock the Axes
+    fig.update_xaxes(fixedrange=True)
+    fig.update_yaxes(fixedrange=True)
+
+    # 2. Disable Dragging
+    fig.update_layout(dragmode=False)
+    return fig
+
+@profiled
+def chart_daily_avg_category_per_country(summaries):
+    chart_data = _summary(summaries, "Summary_Daily_Avg_Category_Per_Country")
     if not chart_data.empty:
         st.caption("Daily Average Spending per Category")
-        
-        # Create the Horizontal Grouped Bar Chart
-        fig = px.bar(
-            chart_data,
-            x="Daily_Avg",       # Swapped to x
-            y="Category",        # Swapped to y
-            color="Country",
-            orientation='h',     # Added for horizontal orientation
-            barmode="group",
-            text="Daily_Avg",
-            title="How much am I spending per day in each country?",
-            labels={"Daily_Avg": "Avg Daily Spend (€)", "Category": "Expense Type"},
-            template="plotly_dark"
-        )
-
-        # Style the numbers to the right of the bars
-        fig.update_traces(textposition='outside', texttemplate='%{text:.2f}')
-        fig.update_layout(uniformtext_minsize=8, uniformtext_mode='hide')
-        fig.update_layout(
-            legend_title_text="",
-            legend=dict(
-            orientation="h",
-            yanchor="top",
-            y=-0.3,            # Pulls it further down away from the X-axis
-            xanchor="center",
-            x=0.5,
-            entrywidth=70,     # Forces items to have specific widths to prevent overlap
-            entrywidthmode="pixels",
-            title=""
-        ),
-            uniformtext_minsize=8, 
-            uniformtext_mode='hide',
-            dragmode=False
-        )
-        
-        
-        # 1. Lock the Axes
-        fig.update_xaxes(fixedrange=True)
-        fig.update_yaxes(fixedrange=True)
-
-        # 2. Disable Dragging
-        fig.update_layout(dragmode=False)
-        st.plotly_chart(fig, width='stretch')
+        fig = cached_figure("daily_avg_category_per_country", build_daily_avg_category_per_country_figure, summaries)
+        render_chart("daily_avg_category_per_country", fig, width='stretch')
     else:
         st.info("Add some expenses with Country and Category tags to see the chart!")
 
-def plot_cumulative_burn(df):
-    # Prepare data
-    burn_df = df.groupby('Date')['Amount'].sum().reset_index().sort_values('Date')
-    burn_df['Cumulative_Total'] = burn_df['Amount'].cumsum()
+def build_cumulative_burn_figure(summaries, budget, max_points=None):
+    # Prepare data (running total is precomputed at ingest time)
+    full_df = _summary(summaries, "Summary_Cumulative_Spend")
+    # One point per pixel is all a phone can show; keep where the curve meets the budget
+    burn_df = downsample_series(full_df, 'Date', 'Cumulative_Total', max_points, level=budget)
+    logger.info(f"Cumulative burn: {len(burn_df)} of {len(full_df)} points plotted.")
 
-    st.caption("📈 Total Spending Over Time")
-    
     # Use area chart for a "cleaner" look
     fig = px.area(
         burn_df,
@@ -117,7 +480,7 @@ def plot_cumulative_burn(df):
     )
 
     # 1. Add Budget Ceiling
-    fig.add_hline(y=TOTAL_BUDGET, line_dash="dash", line_color="#FF4B4B", line_width=1)
+    fig.add_hline(y=budget, line_dash="dash", line_color="#FF4B4B", line_width=1)
 
     # 2. Compress and Clean (The "Neat" settings)
     fig.update_layout(
@@ -135,13 +498,29 @@ def plot_cumulative_burn(df):
 
     # 3. Smooth the line (Optional: makes it look less jagged)
     fig.update_traces(line_shape='spline', line_width=2)
+    return fig
+
+@profiled
+def plot_cumulative_burn(summaries):
+    if _summary(summaries, "Summary_Cumulative_Spend").empty:
+        st.info("No data available for the spending curve.")
+        return
 
-    st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+    st.caption("📈 Total Spending Over Time")
+    fig = cached_figure(
+        "cumulative_burn", build_cumulative_burn_figure, summaries, budget=TOTAL_BUDGET, max_points=CHART_WIDTH_PX
+    )
+    render_chart("cumulative_burn", fig, use_container_width=True, config={'displayModeBar': False})
     
 
-def plot_total_spend(df):
-    total_spent = df['Amount'].sum()
-    total_days = df['Date'].nunique()
+@profiled
+def plot_total_spend(summaries):
+    totals = _summary(summaries, "Summary_Totals")
+    if totals.empty:
+        st.info("No totals available yet.")
+        return
+    total_spent = float(totals['Total_Spent'].iloc[0])
+    total_days = int(totals['Days_Tracked'].iloc[0])
     daily_avg = total_spent / total_days if total_days > 0 else 0
     remaining = TOTAL_BUDGET - total_spent
 
@@ -169,9 +548,8 @@ def plot_total_spend(df):
     st.info(f"💡 At €{daily_avg:,.2f}/day, your budget lasts for **{int(days_remaining)} more days**.")
     st.progress(percent_used, text=f"{percent_used:.1%} of budget exhausted")
 
-def plot_daily_average_per_category(df):
-    cat_avg_df = calculate_daily_average_per_category(df.copy())
-    st.caption("Daily Budget Allocation")
+def build_daily_average_per_category_figure(summaries):
+    cat_avg_df = _summary(summaries, "Summary_Daily_Avg_Per_Category")
 
     fig_pie = px.pie(
         cat_avg_df, 
@@ -194,76 +572,91 @@ def plot_daily_average_per_category(df):
         showlegend=False,         # Hiding the messy scrolling legend
         margin=dict(l=50, r=50, t=20, b=20), # Add side margins so labels don't clip
     )
+    return fig_pie
 
-    st.plotly_chart(fig_pie, use_container_width=True, config={'displayModeBar': False})
+@profiled
+def plot_daily_average_per_category(summaries):
+    st.caption("Daily Budget Allocation")
+    fig_pie = cached_figure("daily_average_per_category", build_daily_average_per_category_figure, summaries)
+    render_chart("daily_average_per_category", fig_pie, use_container_width=True, config={'displayModeBar': False})
+
+def build_country_total_figure(summaries):
+    total_spend = _summary(summaries, "Summary_Total_Spend_Per_Country")
+    total_spend = total_spend[total_spend['Amount'] > 0]
+    max_val = total_spend['Amount'].max()
+    fig_country_total = px.bar(
+        total_spend,
+        x='Amount',
+        y='Country',
+        orientation='h',
+        text='Amount',
+        template="plotly_dark",
+        color='Country',
+        log_x=True
+    )
+
+    # 3. Apply Mobile-Friendly Styling & Scroll-Lock
+    fig_country_total.update_traces(
+        texttemplate='€%{text:,.2f}', 
+        textposition='inside',
+        insidetextanchor='end'
+    )
+    
+    fig_country_total.update_layout(
+        height=300, # Compact height
+        margin=dict(l=10, r=10, t=20, b=10),
+        xaxis_fixedrange=True, # Disable Zoom
+        yaxis_fixedrange=True, # Disable Zoom
+        dragmode=False,        # Disable Pan
+        coloraxis_showscale=False,
+        xaxis_title="Total Euros (€)",
+        yaxis_title="",
+        xaxis_type="log",
+        showlegend=False,
+        xaxis_range=[0, np.log10(max_val * 1.2)], # Starts the 'visual' bar at €1
+    )
+    return fig_country_total
+
+def build_country_daily_figure(summaries):
+    bar_data = _summary(summaries, "Summary_Avg_Daily_Budget_Per_Country")
+    fig_bar = px.bar(bar_data, x='Avg_Daily_Budget', y='Country', orientation='h', text_auto='.2f', template="plotly_dark", color='Country')
+    fig_bar.update_layout(
+        height=300, # Compact height
+        margin=dict(l=10, r=10, t=20, b=10),
+        showlegend=False,
+        xaxis_fixedrange=True, # Disable Zoom
+        yaxis_fixedrange=True, # Disable Zoom
+        dragmode=False,        # Disable Pan,
+        coloraxis_showscale=False, xaxis_title="", yaxis_title="")
+    return fig_bar
     
-def plot_total_and_average_per_country(df):
+@profiled
+def plot_total_and_average_per_country(summaries):
+    total_spend = _summary(summaries, "Summary_Total_Spend_Per_Country")
+    bar_data = _summary(summaries, "Summary_Avg_Daily_Budget_Per_Country")
+    if total_spend.empty or bar_data.empty:
+        st.info("Add some expenses with Country tags to see the country breakdown!")
+        return
     column1, column2 = st.columns(2)
-    total_spend = calculate_total_spend_per_country(df.copy())
-    bar_data = calculate_average_daily_budget_per_country(df.copy())
 
     with column1:
         st.caption("🌏 By Country (Total)")
-        total_spend = total_spend[total_spend['Amount'] > 0]
-        max_val = total_spend['Amount'].max()
-        fig_country_total = px.bar(
-            total_spend,
-            x='Amount',
-            y='Country',
-            orientation='h',
-            text='Amount',
-            template="plotly_dark",
-            color='Country',
-            log_x=True
-        )
-
-        # 3. Apply Mobile-Friendly Styling & Scroll-Lock
-        fig_country_total.update_traces(
-            texttemplate='€%{text:,.2f}', 
-            textposition='inside',
-            insidetextanchor='end'
-        )
-        
-        fig_country_total.update_layout(
-            height=300, # Compact height
-            margin=dict(l=10, r=10, t=20, b=10),
-            xaxis_fixedrange=True, # Disable Zoom
-            yaxis_fixedrange=True, # Disable Zoom
-            dragmode=False,        # Disable Pan
-            coloraxis_showscale=False,
-            xaxis_title="Total Euros (€)",
-            yaxis_title="",
-            xaxis_type="log",
-            showlegend=False,
-            xaxis_range=[0, np.log10(max_val * 1.2)], # Starts the 'visual' bar at €1
-        )
+        fig_country_total = cached_figure("country_total", build_country_total_figure, summaries)
 
         # 4. Display without the floating menu bar
-        st.plotly_chart(fig_country_total, width='stretch', config={'displayModeBar': False})
+        render_chart("country_total", fig_country_total, width='stretch', config={'displayModeBar': False})
 
 
     with column2:
         # B. Daily Average by Country (Bar)
         st.caption("🌏 By Country (Daily)")
-        fig_bar = px.bar(bar_data, x='Avg_Daily_Budget', y='Country', orientation='h', text_auto='.2f', template="plotly_dark", color='Country')
-        fig_bar.update_layout(
-            height=300, # Compact height
-            margin=dict(l=10, r=10, t=20, b=10),
-            showlegend=False,
-            xaxis_fixedrange=True, # Disable Zoom
-            yaxis_fixedrange=True, # Disable Zoom
-            dragmode=False,        # Disable Pan,
-            coloraxis_showscale=False, xaxis_title="", yaxis_title="")
-        st.plotly_chart(fig_bar, width='stretch', config={'displayModeBar': False})
-
-def plot_country_comparison_burn(df):
-    chart_data = calculate_cumulative_spend_per_country_by_day(df)
-    
-    if chart_data.empty:
-        st.info("No data available for comparison.")
-        return
+        fig_bar = cached_figure("country_daily", build_country_daily_figure, summaries)
+        render_chart("country_daily", fig_bar, width='stretch', config={'displayModeBar': False})
 
-    st.caption("📈 Cumulative Spend Comparison (Day-by-Day)")
+def build_country_comparison_burn_figure(summaries, max_points=None):
+    full_data = _summary(summaries, "Summary_Cumulative_Spend_Per_Country")
+    chart_data = downsample_series(full_data, 'Day_Num', 'Cumulative_Total', max_points, group='Country')
+    logger.info(f"Country comparison burn: {len(chart_data)} of {len(full_data)} points plotted.")
 
     fig = px.line(
         chart_data,
@@ -300,9 +693,29 @@ def plot_country_comparison_burn(df):
     )
     # Make the lines slightly thicker for mobile visibility
     fig.update_traces(line=dict(width=3))
+    return fig
 
-    st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
-
-
-
+@profiled
+def plot_country_comparison_burn(summaries):
+    chart_data = _summary(summaries, "Summary_Cumulative_Spend_Per_Country")
     
+    if chart_data.empty:
+        st.info("No data available for comparison.")
+        return
+
+    st.caption("📈 Cumulative Spend Comparison (Day-by-Day)")
+    fig = cached_figure(
+        "country_comparison_burn", build_country_comparison_burn_figure, summaries, max_points=CHART_WIDTH_PX
+    )
+    render_chart("country_comparison_burn", fig, use_container_width=True, config={'displayModeBar': False})
+
+@profiled
+def table_transactions(months):
+    """Transactions of the given 'YYYY-MM' months, newest first, under a row count and total."""
+    df = get_data(months=months)
+    if df.empty:
+        st.info("No transactions in the selected months.")
+        return
+    total = float(cents_to_currency(df['Amount'].sum()))
+    st.caption(f"{len(df):,} transactions, €{total:,.2f} in total.")
+    st.dataframe(format_for_sheets(df.sort_values('Date', ascending=False)), hide_index=True)
@@ -0,0 +1,125 @@
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.getenv("DATA_DIR", "data")
+INDEX_DIR = os.path.join(DATA_DIR, "index")
+FINGERPRINT_COL = "Fingerprint"
+
+# The header occupies row 1, so the first transaction lives on sheet row 2
+FIRST_DATA_ROW = 2
+
+
+class FingerprintIndex:
+    """
+    Local record of which transaction fingerprint sits on which sheet row.
+    Lets an upload work out the minimal set of appends and in-place patches
+    instead of clearing and rewriting the whole tab.
+    """
+
+    def __init__(self, sheet_name, header=None, rows=None):
+        self.sheet_name = sheet_name
+        self.header = header or []
+        self.rows = rows or {}
+
+    @property
+    def path(self):
+        return os.path.join(INDEX_DIR, f"{self.sheet_name}.json")
+
+    @classmethod
+    def load(cls, sheet_name):
+        """Loads the index from disk. Returns None if it doesn't exist or is unreadable."""
+        index = cls(sheet_name)
+        if not os.path.exists(index.path):
+            return None
+        try:
+            with open(index.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            index.header = payload["header"]
+            index.rows = payload["rows"]
+            return index
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable fingerprint index {index.path}: {e}")
+            return None
+
+    @classmethod
+    def from_fingerprints(cls, sheet_name, header, fingerprints):
+        """Builds an index from fingerprints listed in sheet order (row 2 onwards)."""
+        rows = {fp: FIRST_DATA_ROW + i for i, fp in enumerate(fingerprints) if fp}
+        return cls(sheet_name, header, rows)
+
+    @classmethod
+    def remove(cls, sheet_name):
+        """Forgets the index of a deleted tab, so a tab recreated later is written in full."""
+        try:
+            os.remove(cls(sheet_name).path)
+        except FileNotFoundError:
+            pass
+
+    def save(self):
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"header": self.header, "rows": self.rows}, f)
+        # Atomic swap so a crash never leaves a half-written index behind
+        os.replace(tmp_path, self.path)
+
+    def plan(self, fingerprints):
+        """
+        Diffs the new fingerprints (in DataFrame order) against the stored rows.
+        Returns: (assignments, old_last_row, new_index)
+            assignments: dict of sheet row -> position in the new DataFrame,
+                         covering only rows whose content has to be (re)written.
+        Rows that vanished from the export become holes; new rows fill holes
+        first, then get appended. Leftover holes are filled by moving rows from
+        the bottom of the sheet, so the tab stays dense.
+        """
+        old_last_row = max(self.rows.values(), default=FIRST_DATA_ROW - 1)
+        new_row_count = len(fingerprints)
+        last_row = FIRST_DATA_ROW + new_row_count - 1
+
+        current = set(fingerprints)
+        holes = sorted(row for fp, row in self.rows.items() if fp not in current)
+        added = [pos for pos, fp in enumerate(fingerprints) if fp not in self.rows]
+
+        new_rows = {fp: self.rows[fp] for fp in fingerprints if fp in self.rows}
+        assignments = {}
+
+        # 1. New or edited rows fill holes first, then go to the end of the sheet
+        next_free = old_last_row + 1
+        used_holes = 0
+        for pos in added:
+            if used_holes < len(holes):
+                row = holes[used_holes]
+                used_holes += 1
+            else:
+                row = next_free
+                next_free += 1
+            assignments[row] = pos
+            new_rows[fingerprints[pos]] = row
+
+        # 2. Remaining holes inside the new extent get filled from the bottom
+        holes = [row for row in holes[used_holes:] if row <= last_row]
+        if holes:
+            position = {fp: pos for pos, fp in enumerate(fingerprints)}
+            movers = sorted(
+                (row, fp) for fp, row in new_rows.items() if row > last_row
+            )
+            for hole, (_, fp) in zip(holes, movers):
+                assignments[hole] = position[fp]
+                new_rows[fp] = hole
+
+        return assignments, old_last_row, FingerprintIndex(self.sheet_name, self.header, new_rows)
+
+
+def contiguous_blocks(rows):
+    """Groups sorted sheet rows into (start_row, end_row) runs so patches become few ranges."""
+    blocks = []
+    for row in sorted(rows):
+        if blocks and row == blocks[-1][1] + 1:
+            blocks[-1][1] = row
+        else:
+            blocks.append([row, row])
+    return [tuple(block) for block in blocks]
@@ -1,52 +1,427 @@
-import gspread
+import os
+import math
+import time
+import random
 import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
 import pandas as pd
-from google.oauth2.service_account import Credentials
+from gspread.utils import rowcol_to_a1
+from services.fingerprint_index import FingerprintIndex, FINGERPRINT_COL, contiguous_blocks
+from services.storage_backends import create_backend, TabNotFoundError, SHEETS_MAX_CELLS_PER_REQUEST
 
 logger = logging.getLogger(__name__)
 
-# API permissions required
-SCOPES = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
+# Request pacing and retries (Sheets allows 60 requests per minute per user by default)
+SHEETS_REQUESTS_PER_MINUTE = float(os.getenv("SHEETS_REQUESTS_PER_MINUTE", "60"))
+SHEETS_BURST = int(os.getenv("SHEETS_BURST", "10"))
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+SHEETS_BACKOFF_BASE_S = float(os.getenv("SHEETS_BACKOFF_BASE_S", "1"))
+SHEETS_BACKOFF_MAX_S = float(os.getenv("SHEETS_BACKOFF_MAX_S", "32"))
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Process-wide services keyed by (json_key_path, spreadsheet_id), see get_sheets_service
+_services = {}
+_services_lock = threading.Lock()
+
+def dataframe_to_values(df, include_header=True):
+    """Serialises a DataFrame into the list-of-rows payload the Sheets API expects."""
+    values = df.fillna('').values.tolist()
+    if include_header:
+        return [df.columns.values.tolist()] + values
+    return values
+
+def values_to_dataframe(rows):
+    """Builds a DataFrame from a header row plus value rows, as returned by the Sheets API."""
+    if not rows:
+        return pd.DataFrame()
+    header = rows[0]
+    # The API trims trailing blanks, so pad every row back to the header width
+    body = [row + [''] * (len(header) - len(row)) for row in rows[1:]]
+    return pd.DataFrame(body, columns=header)
+
+def _column_letter(index):
+    """A1 column letter for a 0-based column index."""
+    return rowcol_to_a1(1, index + 1)[:-1]
+
+class SheetsRequestError(Exception):
+    """Raised when a read keeps failing after retries, so callers can tell it from 'no data'."""
+
+
+def _status_code(error):
+    """HTTP status of a failed call: gspread APIError carries the response, the local backend a status_code."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+class RequestScheduler:
+    """
+    Paces calls to the storage backend and absorbs transient failures:
+    - a token bucket keeps requests under requests_per_minute, allowing bursts of `burst`,
+    - 429 and 5xx responses are retried with jittered exponential backoff,
+    - concurrent identical reads share one in-flight call,
+    - latency, retry and failure counts are kept per operation (see stats()).
+    """
+
+    def __init__(self, requests_per_minute=SHEETS_REQUESTS_PER_MINUTE, burst=SHEETS_BURST,
+                 max_retries=SHEETS_MAX_RETRIES, backoff_base_s=SHEETS_BACKOFF_BASE_S,
+                 backoff_max_s=SHEETS_BACKOFF_MAX_S):
+        self.rate = requests_per_minute / 60
+        self.capacity = max(burst, 1)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._metrics = {}
+
+    def _acquire(self, cost):
+        """Blocks until the bucket holds enough tokens for a call."""
+        cost = min(cost, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= cost:
+                    self._tokens -= cost
+                    return
+                wait = (cost - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def _record(self, operation, seconds=None, retries=0, failed=False, coalesced=False):
+        with self._lock:
+            metrics = self._metrics.setdefault(operation, {
+                "calls": 0, "retries": 0, "failures": 0, "coalesced": 0, "latencies": deque(maxlen=500),
+            })
+            if coalesced:
+                metrics["coalesced"] += 1
+                return
+            metrics["calls"] += 1
+            metrics["retries"] += retries
+            metrics["failures"] += failed
+            metrics["latencies"].append(seconds)
+
+    def _run(self, operation, fn, args, cost):
+        start = time.perf_counter()
+        retries = 0
+        while True:
+            self._acquire(cost)
+            try:
+                result = fn(*args)
+                self._record(operation, time.perf_counter() - start, retries)
+                return result
+            except Exception as e:
+                status = _status_code(e)
+                if status not in RETRYABLE_STATUS or retries >= self.max_retries:
+                    self._record(operation, time.perf_counter() - start, retries, failed=True)
+                    raise
+                delay = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** retries))
+                retries += 1
+                logger.warning(f"⏳ {operation} got HTTP {status}. Retry {retries}/{self.max_retries} in {delay:.1f}s.")
+                time.sleep(delay)
+
+    def call(self, operation, fn, *args, cost=1, coalesce=False):
+        """
+        Runs fn(*args) under the rate limit with retries.
+        cost: Number of API requests the call makes. coalesce: Share the result with
+        identical calls already in flight (only for reads).
+        """
+        if not coalesce:
+            return self._run(operation, fn, args, cost)
+
+        key = (operation,) + tuple(tuple(arg) if isinstance(arg, list) else arg for arg in args)
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            self._record(operation, coalesced=True)
+            return future.result()
+
+        try:
+            result = self._run(operation, fn, args, cost)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        """Per-operation call, retry, failure and coalesced counts with p50/p95 latency in ms."""
+        with self._lock:
+            snapshot = {op: dict(m, latencies=sorted(m["latencies"])) for op, m in self._metrics.items()}
+        stats = {}
+        for operation, metrics in snapshot.items():
+            latencies = metrics.pop("latencies")
+            if latencies:
+                metrics["p50_ms"] = round(latencies[len(latencies) // 2] * 1000, 1)
+                metrics["p95_ms"] = round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000, 1)
+            stats[operation] = metrics
+        return stats
+
 
 class GoogleSheetsService:
-    def __init__(self, json_key_path, spreadsheet_id):
+    def __init__(self, json_key_path=None, spreadsheet_id=None, backend=None, scheduler=None):
+        """
+        backend: Optional StorageBackend. Defaults to the one selected by STORAGE_BACKEND
+        (Google Sheets unless configured otherwise).
+        scheduler: Optional RequestScheduler shared by every call this service makes.
+        """
         self.spreadsheet_id = spreadsheet_id
-        # Authenticate once when the service is initialized
-        creds = Credentials.from_service_account_file(json_key_path, scopes=SCOPES)
-        self.client = gspread.authorize(creds)
-        self.spreadsheet = self.client.open_by_key(spreadsheet_id)
-
-    def write_dataframe_to_sheet(self, df, sheet_name):
-        """Writes a specific Pandas DataFrame to a named sheet tab."""
-        try:
-            # 1. Prepare data (Headers + Values)
-            data = [df.columns.values.tolist()] + df.fillna('').values.tolist()
-            
-            # 2. Find or create the worksheet
-            try:
-                worksheet = self.spreadsheet.worksheet(sheet_name)
-            except gspread.exceptions.WorksheetNotFound:
-                worksheet = self.spreadsheet.add_worksheet(title=sheet_name, rows="100", cols="20")
-                logger.info(f"Created new worksheet: {sheet_name}")
-
-            # 3. Overwrite data
-            worksheet.clear()
-            worksheet.update('A1', data)
+        self.backend = backend if backend is not None else create_backend(json_key_path, spreadsheet_id)
+        self.scheduler = scheduler if scheduler is not None else RequestScheduler()
+
+    def write_dataframe_to_sheet(self, df, sheet_name, incremental=False):
+        """
+        Writes a specific Pandas DataFrame to a named sheet tab.
+        With incremental=True and a 'Fingerprint' column present, only new rows are
+        appended and edited rows patched in place; otherwise the tab is rewritten.
+        """
+        try:
+            if incremental and FINGERPRINT_COL in df.columns:
+                index = self._load_fingerprint_index(sheet_name, df)
+                if index is not None:
+                    return self._write_incremental(sheet_name, df, index)
+
+            # Overwrite data (Headers + Values)
+            self.scheduler.call("write_tab", self.backend.write_tab, sheet_name, dataframe_to_values(df), cost=3)
+            if FINGERPRINT_COL in df.columns:
+                FingerprintIndex.from_fingerprints(
+                    sheet_name, df.columns.tolist(), df[FINGERPRINT_COL].tolist()
+                ).save()
             logger.info(f"Successfully updated {sheet_name} with {len(df)} rows.")
             return True
         except Exception as e:
             logger.error(f"Error writing to sheet {sheet_name}: {e}")
             return False
+
+    def write_dataframes_to_sheets(self, frames, incremental=False):
+        """
+        Writes several DataFrames to their named tabs in one batch.
+        Tabs eligible for an incremental write (see write_dataframe_to_sheet) keep
+        their own path; every other tab is rewritten together in a constant number
+        of requests.
+        Returns: The list of tab names that failed to write (empty on success).
+        """
+        batch = {}
+        failed = []
+        for sheet_name, df in frames.items():
+            if incremental and FINGERPRINT_COL in df.columns:
+                if not self.write_dataframe_to_sheet(df, sheet_name, incremental=True):
+                    failed.append(sheet_name)
+            else:
+                batch[sheet_name] = df
+
+        if not batch:
+            return failed
+        try:
+            tabs = {name: dataframe_to_values(df) for name, df in batch.items()}
+            # One metadata read, one structural update, then the chunked value updates
+            cells = sum(len(rows) * len(rows[0]) for rows in tabs.values() if rows)
+            self.scheduler.call("write_tabs", self.backend.write_tabs, tabs, cost=2 + math.ceil(cells / SHEETS_MAX_CELLS_PER_REQUEST))
+            for sheet_name, df in batch.items():
+                if FINGERPRINT_COL in df.columns:
+                    FingerprintIndex.from_fingerprints(
+                        sheet_name, df.columns.tolist(), df[FINGERPRINT_COL].tolist()
+                    ).save()
+            logger.info(f"Successfully updated {len(batch)} tabs in one batch.")
+        except Exception as e:
+            logger.error(f"Error batch-writing sheets {list(batch)}: {e}")
+            failed.extend(batch)
+        return failed
+
+    def delete_sheets(self, sheet_names):
+        """Removes tabs in one request. Returns True on success."""
+        try:
+            self.scheduler.call("delete_tabs", self.backend.delete_tabs, list(sheet_names), cost=2)
+            for sheet_name in sheet_names:
+                FingerprintIndex.remove(sheet_name)
+            logger.info(f"Deleted {len(sheet_names)} tabs: {', '.join(sheet_names)}.")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting sheets {sheet_names}: {e}")
+            return False
+
+    def _load_fingerprint_index(self, sheet_name, df):
+        """
+        Returns the local fingerprint index for this tab, rebuilding it from the sheet's
+        own 'Fingerprint' column if the local copy is missing. Returns None when the
+        tab is missing or its layout doesn't match the DataFrame and a full rewrite is needed.
+        """
+        header = df.columns.tolist()
+        index = FingerprintIndex.load(sheet_name)
+        if index is not None and index.header == header:
+            return index
+
+        try:
+            sheet_header = next(iter(self.scheduler.call("read_range", self.backend.read_range, sheet_name, "1:1")), [])
+        except Exception as e:
+            logger.info(f"Could not read the header of {sheet_name} ({e}). Falling back to a full rewrite.")
+            return None
+        if sheet_header != header:
+            logger.info(f"Layout of {sheet_name} changed. Falling back to a full rewrite.")
+            return None
+
+        column = _column_letter(header.index(FINGERPRINT_COL))
+        fingerprints = [
+            str(row[0]) if row else ''
+            for row in self.scheduler.call("read_range", self.backend.read_range, sheet_name, f"{column}2:{column}")
+        ]
+        logger.info(f"Rebuilt fingerprint index for {sheet_name} from {len(fingerprints)} sheet rows.")
+        return FingerprintIndex.from_fingerprints(sheet_name, header, fingerprints)
+
+    def _write_incremental(self, sheet_name, df, index):
+        """Appends new rows and patches changed ranges according to the fingerprint diff."""
+        assignments, old_last_row, new_index = index.plan(df[FINGERPRINT_COL].tolist())
+        last_row = len(df) + 1
+
+        if not assignments and old_last_row <= last_row:
+            logger.info(f"{sheet_name} already up to date. Nothing to write.")
+            return True
+
+        # 1. One block per contiguous run of changed rows, sent in a single request
+        values = dataframe_to_values(df, include_header=False)
+        blocks = [
+            (start, [values[assignments[row]] for row in range(start, end + 1)])
+            for start, end in contiguous_blocks(assignments)
+        ]
+        if blocks:
+            self.scheduler.call("update_rows", self.backend.update_rows, sheet_name, blocks)
+
+        # 2. Blank out rows left over when the export shrank
+        if old_last_row > last_row:
+            self.scheduler.call("clear_rows", self.backend.clear_rows, sheet_name, last_row + 1, old_last_row)
+
+        new_index.save()
+        logger.info(
+            f"Incrementally updated {sheet_name}: {len(assignments)} rows written "
+            f"in {len(blocks)} ranges, {len(df)} rows total."
+        )
+        return True
     
     def read_sheet_to_dataframe(self, sheet_name):
-        """Reads a specific sheet tab and returns it as a Pandas DataFrame."""
+        """
+        Reads a specific sheet tab and returns it as a Pandas DataFrame (empty if the tab
+        doesn't exist). Raises SheetsRequestError if Sheets stays unavailable after retries.
+        """
         try:
-            worksheet = self.spreadsheet.worksheet(sheet_name)
-            data = worksheet.get_all_records()
-            df = pd.DataFrame(data)
-            logger.info(f"Successfully read {len(df)} rows from {sheet_name}.")
-            return df
+            rows = self.scheduler.call("read_tab", self.backend.read_tab, sheet_name, coalesce=True)
+        except TabNotFoundError:
+            logger.warning(f"Sheet {sheet_name} does not exist.")
+            return pd.DataFrame()
         except Exception as e:
             logger.error(f"Error reading from sheet {sheet_name}: {e}")
-            return pd.DataFrame()
-    
+            raise SheetsRequestError(f"Could not read {sheet_name}: {e}") from e
+        df = values_to_dataframe(rows)
+        logger.info(f"Successfully read {len(df)} rows from {sheet_name}.")
+        return df
+
+    def read_columns_to_dataframe(self, sheet_name, columns):
+        """
+        Reads only the named columns of a tab as raw unformatted values and builds the
+        DataFrame column-wise: one tiny header read plus one batched column read, with
+        no per-row dicts or type guessing. Columns the tab doesn't have are skipped.
+        Returns an empty DataFrame if the tab doesn't exist; raises SheetsRequestError
+        if Sheets stays unavailable after retries.
+        """
+        return self.read_columns_to_dataframes([sheet_name], columns).get(sheet_name, pd.DataFrame())
+
+    def read_columns_to_dataframes(self, sheet_names, columns):
+        """
+        read_columns_to_dataframe for several tabs sharing one layout (e.g. month
+        partitions): the header of the first tab is read once and the columns of every
+        tab come back in a single batched request.
+        Returns: A dictionary of sheet name -> DataFrame (empty dict if the tabs don't exist).
+        """
+        if not sheet_names:
+            return {}
+        try:
+            header = next(iter(
+                self.scheduler.call("read_range", self.backend.read_range, sheet_names[0], "1:1", coalesce=True)
+            ), [])
+            present = [col for col in columns if col in header]
+            if not present:
+                logger.warning(f"Sheet {sheet_names[0]} has none of the columns {columns}.")
+                return {}
+            ranges = [f"{letter}2:{letter}" for letter in (_column_letter(header.index(col)) for col in present)]
+            tabs = self.scheduler.call(
+                "read_column_ranges", self.backend.read_column_ranges, list(sheet_names), ranges, coalesce=True
+            )
+        except TabNotFoundError:
+            logger.warning(f"Some of the sheets {sheet_names} do not exist.")
+            return {}
+        except Exception as e:
+            logger.error(f"Error reading columns {columns} from sheets {sheet_names}: {e}")
+            raise SheetsRequestError(f"Could not read {', '.join(sheet_names)}: {e}") from e
+
+        frames = {}
+        for sheet_name, data in tabs.items():
+            # Each column comes back with its own trailing blanks trimmed
+            n_rows = max(map(len, data), default=0)
+            frames[sheet_name] = pd.DataFrame(
+                {col: values + [''] * (n_rows - len(values)) for col, values in zip(present, data)}
+            )
+        logger.info(
+            f"Successfully read {sum(map(len, frames.values()))} rows x {len(present)} columns "
+            f"from {len(frames)} tabs."
+        )
+        return frames
+
+    def read_sheets_to_dataframes(self, sheet_names):
+        """
+        Reads several small tabs in a single batched request.
+        Returns: A dictionary of sheet name -> DataFrame for the tabs that exist and have rows.
+        Raises SheetsRequestError if Sheets stays unavailable after retries.
+        """
+        try:
+            tabs = self.scheduler.call("read_tabs", self.backend.read_tabs, list(sheet_names), coalesce=True)
+        except TabNotFoundError:
+            logger.warning(f"Some of the sheets {sheet_names} do not exist.")
+            return {}
+        except Exception as e:
+            logger.error(f"Error batch-reading sheets {sheet_names}: {e}")
+            raise SheetsRequestError(f"Could not read {len(sheet_names)} summary tabs: {e}") from e
+        frames = {name: values_to_dataframe(rows) for name, rows in tabs.items() if len(rows) >= 2}
+        logger.info(f"Successfully read {len(frames)} of {len(sheet_names)} tabs in one batch.")
+        return frames
+
+    def write_data_version(self, token, content_hash, timestamp):
+        """Stamps the data-version token into the metadata tab."""
+        try:
+            self.scheduler.call("write_version", self.backend.write_version, token, content_hash, timestamp)
+            logger.info(f"Stamped data version {token}.")
+            return True
+        except Exception as e:
+            logger.error(f"Error writing data version: {e}")
+            return False
+
+    def read_data_version(self):
+        """Reads the current data-version token with a single tiny range read. Returns None if unset."""
+        try:
+            return self.scheduler.call("read_version", self.backend.read_version, coalesce=True)
+        except Exception as e:
+            logger.warning(f"Could not read data version: {e}")
+            return None
+
+
+def get_sheets_service(json_key_path, spreadsheet_id):
+    """
+    Returns the shared GoogleSheetsService for a spreadsheet, creating it on first use.
+    Creation is cheap and offline; the backend authenticates on its first request and
+    then reuses credentials, HTTP session and worksheet handles across callers.
+    """
+    key = (json_key_path, spreadsheet_id)
+    with _services_lock:
+        if key not in _services:
+            _services[key] = GoogleSheetsService(json_key_path, spreadsheet_id)
+        return _services[key]
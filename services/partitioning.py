@@ -0,0 +1,110 @@
+import os
+import hashlib
+import logging
+
+import pandas as pd
+
+from services.fingerprint_index import FINGERPRINT_COL
+from services.google_sheet_services import SheetsRequestError
+
+logger = logging.getLogger(__name__)
+
+# Publish 'Cleaned_Data' to Sheets as one tab per month plus an index tab
+PARTITION_BY_MONTH = os.getenv("PARTITION_BY_MONTH", "false").lower() in ("1", "true", "yes")
+PARTITION_PREFIX = "Cleaned_Data_"
+# The single tab the partitions replace
+UNPARTITIONED_TAB = "Cleaned_Data"
+PARTITION_INDEX_TAB = "Partition_Index"
+INDEX_COLUMNS = ['Partition', 'Tab', 'Rows', 'Total', 'Checksum']
+
+
+def partition_tab(month):
+    """Tab name of a month partition, e.g. 'Cleaned_Data_2024-03'."""
+    return f"{PARTITION_PREFIX}{month}"
+
+
+def partition_checksum(df):
+    """Order-sensitive content hash of a partition (columns and every cell)."""
+    digest = hashlib.sha256("|".join(map(str, df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def split_by_month(df):
+    """
+    Splits a Sheets-formatted cleaned frame into {month: frame} on its 'Month' column.
+    Fingerprints are dropped: partitions are rewritten whole when their checksum changes.
+    """
+    df = df.drop(columns=[FINGERPRINT_COL], errors="ignore")
+    return {
+        str(month): part.reset_index(drop=True)
+        for month, part in df.groupby('Month', sort=True, observed=True)
+    }
+
+
+def build_partition_index(partitions):
+    """One row per partition with its tab, row count, total spend and checksum."""
+    return pd.DataFrame(
+        [
+            [month, partition_tab(month), len(part), round(float(part['Amount'].sum()), 2), partition_checksum(part)]
+            for month, part in partitions.items()
+        ],
+        columns=INDEX_COLUMNS,
+    )
+
+
+def plan_partition_upload(service, df):
+    """
+    Compares the month partitions of df with the index currently in Sheets.
+    Returns: (tabs, stale_tabs) where tabs maps the changed partition tabs and the
+    new index tab to their DataFrames, and stale_tabs lists partitions that no
+    longer exist. Without a readable index every partition is rewritten and the
+    single 'Cleaned_Data' tab of unpartitioned uploads is retired with them.
+    """
+    partitions = split_by_month(df)
+    index = build_partition_index(partitions)
+
+    try:
+        previous = service.read_sheet_to_dataframe(PARTITION_INDEX_TAB)
+    except SheetsRequestError:
+        previous = pd.DataFrame()
+    previous_checksums = {}
+    if not previous.empty and set(INDEX_COLUMNS) <= set(previous.columns):
+        previous_checksums = dict(zip(previous['Partition'].astype(str), previous['Checksum'].astype(str)))
+
+    changed = [
+        month for month, checksum in zip(index['Partition'], index['Checksum'])
+        if previous_checksums.get(month) != checksum
+    ]
+    stale_tabs = [partition_tab(month) for month in previous_checksums if month not in partitions]
+    if not previous_checksums:
+        # First partitioned upload: the full tab would otherwise keep its old rows forever
+        stale_tabs.append(UNPARTITIONED_TAB)
+    logger.info(
+        f"🗂️ {len(partitions)} month partitions: {len(changed)} changed, "
+        f"{len(partitions) - len(changed)} unchanged, {len(stale_tabs)} removed."
+    )
+
+    tabs = {partition_tab(month): partitions[month] for month in changed}
+    tabs[PARTITION_INDEX_TAB] = index
+    return tabs, stale_tabs
+
+
+def read_partitions(service, columns, months=None):
+    """
+    Reads the month partitions listed in the index tab, optionally only `months`
+    ('YYYY-MM' strings), projected to `columns`.
+    Returns: The concatenated frame (Sheets-formatted), or None if there is no index.
+    """
+    index = service.read_sheet_to_dataframe(PARTITION_INDEX_TAB)
+    if index.empty:
+        return None
+    if months is not None:
+        index = index[index['Partition'].astype(str).isin(set(months))]
+
+    frames = service.read_columns_to_dataframes(index['Tab'].astype(str).tolist(), columns)
+    frames = [frame for frame in frames.values() if not frame.empty]
+    logger.info(f"Read {len(frames)} of {len(index)} month partitions.")
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import logging
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Profile every render, or only those opened with ?profile=1
+DASHBOARD_PROFILE = os.getenv("DASHBOARD_PROFILE", "false").lower() in ("1", "true", "yes")
+PROFILE_QUERY_PARAM = "profile"
+_SESSION_KEY = "_render_profile"
+
+# Profiled runs (across sessions) holding the tracemalloc session this module started
+_tracing_lock = threading.Lock()
+_tracing_runs = 0
+
+
+def profiling_enabled():
+    if DASHBOARD_PROFILE:
+        return True
+    try:
+        return st.query_params.get(PROFILE_QUERY_PARAM, "").lower() in ("1", "true", "yes")
+    except Exception:
+        return False
+
+
+def _acquire_tracing():
+    """
+    Starts tracemalloc for a profiled run unless it already runs. Process-wide and slows
+    allocations, which is why profiling is opt-in.
+    Returns: True if the caller must release it, False if someone else started it.
+    """
+    global _tracing_runs
+    with _tracing_lock:
+        if _tracing_runs == 0:
+            if tracemalloc.is_tracing():
+                return False
+            tracemalloc.start()
+        _tracing_runs += 1
+        return True
+
+
+def _release_tracing():
+    """Stops tracemalloc once the last profiled run that needed it is done."""
+    global _tracing_runs
+    with _tracing_lock:
+        _tracing_runs -= 1
+        if _tracing_runs == 0:
+            tracemalloc.stop()
+
+
+def _finish_profile(profile):
+    if profile is not None and profile.get("_tracing"):
+        profile["_tracing"] = False
+        _release_tracing()
+
+
+def start_profile():
+    """
+    Starts a fresh profile for this script run if profiling is enabled.
+    Fragment reruns don't call this, so their sections update the last full run's profile.
+    Returns: The profile dict, or None when profiling is off.
+    """
+    # A run that stopped before render_profile_panel still holds tracemalloc
+    _finish_profile(st.session_state.get(_SESSION_KEY))
+    if not profiling_enabled():
+        st.session_state.pop(_SESSION_KEY, None)
+        return None
+    profile = {
+        "started": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        "sections": {},
+        "_open": [],
+        "_tracing": _acquire_tracing(),
+    }
+    st.session_state[_SESSION_KEY] = profile
+    return profile
+
+
+def current_profile():
+    try:
+        return st.session_state.get(_SESSION_KEY)
+    except Exception:
+        # Outside a Streamlit session (benchmarks, scripts) there is nothing to profile
+        return None
+
+
+@contextmanager
+def profile_section(name):
+    """
+    Times a dashboard section and measures its Python heap use with tracemalloc:
+    net_kb is what the section left allocated, peak_kb its high-water mark above the
+    starting point (approximate for nested sections). Yields the section's entry, or
+    None when profiling is off.
+    """
+    profile = current_profile()
+    if profile is None:
+        yield None
+        return
+
+    entry = {"figures": []}
+    # A fragment rerun comes after the full run released tracemalloc, so it traces just its section
+    owns_tracing = not profile["_open"] and not profile.get("_tracing") and _acquire_tracing()
+    if not profile["_open"]:
+        tracemalloc.reset_peak()
+    profile["_open"].append(entry)
+    start_memory = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield entry
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        entry["ms"] = round((time.perf_counter() - start) * 1000, 1)
+        entry["net_kb"] = round((current - start_memory) / 1024, 1)
+        entry["peak_kb"] = round(max(peak - start_memory, 0) / 1024, 1)
+        profile["_open"].remove(entry)
+        profile["sections"][name] = entry
+        if owns_tracing:
+            _release_tracing()
+
+
+def profiled(func):
+    """Profiles every call of a dashboard section under the function's name."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with profile_section(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def note(**fields):
+    """Adds fields (cache status, data source, ...) to the innermost open section."""
+    profile = current_profile()
+    if profile is not None and profile["_open"]:
+        profile["_open"][-1].update(fields)
+
+
+def note_figure(chart_id, **fields):
+    """Adds a per-figure record (cache hit, build time, payload size) to the innermost open section."""
+    profile = current_profile()
+    if profile is None or not profile["_open"]:
+        return
+    figures = profile["_open"][-1]["figures"]
+    for figure in figures:
+        if figure["chart"] == chart_id:
+            figure.update(fields)
+            return
+    figures.append(dict(chart=chart_id, **fields))
+
+
+def snapshot():
+    """The current profile as a JSON-ready dict, without bookkeeping fields."""
+    profile = current_profile()
+    if profile is None:
+        return None
+    return {key: value for key, value in profile.items() if not key.startswith("_")}
+
+
+def render_profile_panel():
+    """
+    Collapsible breakdown of the last render plus a JSON snapshot for diffing runs.
+    Ends the profiled run, so call it last in the script.
+    """
+    _finish_profile(current_profile())
+    data = snapshot()
+    if data is None:
+        return
+
+    rows = []
+    for name, entry in data["sections"].items():
+        figures = entry.get("figures", [])
+        rows.append({
+            "Section": name,
+            "ms": entry.get("ms"),
+            "Net KB": entry.get("net_kb"),
+            "Peak KB": entry.get("peak_kb"),
+            "Cache": entry.get("cache") or ", ".join(f"{f['chart']}: {f.get('cache', '?')}" for f in figures),
+            "Payload KB": round(sum(f.get("payload_kb", 0) for f in figures), 1) or None,
+        })
+    logger.info(f"⏱️ Render profile: {json.dumps(data)}")
+
+    with st.expander("⏱️ Render profile"):
+        st.caption(f"Render started {data['started']}. Charts in fragments update on their own reruns.")
+        st.dataframe(pd.DataFrame(rows), hide_index=True)
+        st.download_button(
+            "Download JSON snapshot",
+            data=json.dumps(data, indent=2),
+            file_name=f"render_profile_{data['started'].replace(':', '')}.json",
+            mime="application/json",
+        )
@@ -0,0 +1,114 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import logging
+from datetime import datetime, timezone
+
+import pyarrow.feather as feather
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.getenv("DATA_DIR", "data")
+RESULT_CACHE_DIR = os.path.join(DATA_DIR, "processed")
+PUBLISHED_PATH = os.path.join(RESULT_CACHE_DIR, "published.json")
+# Number of processed uploads kept on disk; the least recently used are evicted
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "5"))
+# The canonical frame the tabs were formatted from, stored next to them for the local store
+CANONICAL_FILE = "canonical.feather"
+
+
+def result_key(source, pipeline_version, options=""):
+    """
+    SHA-256 of the upload (a file path or its raw bytes, as received) plus the
+    pipeline version and any output-shaping options.
+    """
+    digest = hashlib.sha256(f"{pipeline_version}|{options}|".encode("utf-8"))
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+        return digest.hexdigest()
+    with open(source, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_published_key():
+    """Key of the upload currently published to Sheets, or None if unknown."""
+    try:
+        with open(PUBLISHED_PATH, "r", encoding="utf-8") as f:
+            return json.load(f).get("key")
+    except (OSError, ValueError):
+        return None
+
+
+def mark_published(key, version=None):
+    """Records which upload is live. Pass key=None when a publish starts, so a failed one never looks current."""
+    os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{PUBLISHED_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"key": key, "version": version}, f)
+    os.replace(tmp_path, PUBLISHED_PATH)
+
+
+def load_result(key):
+    """
+    Returns what store_result kept for a key as (canonical DataFrame, {sheet name: DataFrame}
+    in their original order), or None on a miss. A hit marks the entry as recently used.
+    """
+    target = os.path.join(RESULT_CACHE_DIR, key)
+    try:
+        with open(os.path.join(target, "meta.json"), "r", encoding="utf-8") as f:
+            tabs = json.load(f)["tabs"]
+        canonical = feather.read_feather(os.path.join(target, CANONICAL_FILE))
+        result = {name: feather.read_feather(os.path.join(target, f"{i}.feather")) for i, name in enumerate(tabs)}
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable cached result {key[:12]}: {e}")
+        return None
+
+    os.utime(target)
+    logger.info(f"♻️ Result cache hit for {key[:12]} ({len(result)} tabs).")
+    return canonical, result
+
+
+def store_result(key, canonical, sheets_data):
+    """
+    Stores the canonical frame and the processed tabs for a key, and evicts the least
+    recently used entries beyond RESULT_CACHE_SIZE.
+    """
+    os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+    target = os.path.join(RESULT_CACHE_DIR, key)
+    # Runs outside the publish lock, so every call writes into its own temporary directory
+    tmp_target = tempfile.mkdtemp(prefix=f"{key}.", suffix=".tmp", dir=RESULT_CACHE_DIR)
+    try:
+        # Tab names can contain anything, so files are numbered and the names kept in meta.json
+        for i, df in enumerate(sheets_data.values()):
+            feather.write_feather(df.reset_index(drop=True), os.path.join(tmp_target, f"{i}.feather"))
+        feather.write_feather(canonical, os.path.join(tmp_target, CANONICAL_FILE))
+        with open(os.path.join(tmp_target, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "tabs": list(sheets_data),
+                "created": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            }, f)
+    except BaseException:
+        shutil.rmtree(tmp_target, ignore_errors=True)
+        raise
+
+    try:
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp_target, target)
+    except OSError:
+        # A concurrent job stored the same upload in between; its entry is identical
+        shutil.rmtree(tmp_target, ignore_errors=True)
+
+    entries = sorted(
+        (entry for entry in os.scandir(RESULT_CACHE_DIR) if entry.is_dir() and not entry.name.endswith(".tmp")),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in entries[:max(len(entries) - RESULT_CACHE_SIZE, 0)]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+        logger.info(f"Evicted cached result {entry.name[:12]}.")
+    logger.info(f"💾 Cached processed result {key[:12]}.")
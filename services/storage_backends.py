@@ -0,0 +1,537 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import logging
+import threading
+from collections import Counter, deque
+from contextlib import closing
+from datetime import datetime, timezone
+
+import gspread
+from gspread.utils import rowcol_to_a1, a1_range_to_grid_range
+from google.auth.transport.requests import Request
+from google.oauth2.service_account import Credentials
+
+logger = logging.getLogger(__name__)
+
+# API permissions required
+SCOPES = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
+
+# Small metadata tab holding the data-version token stamped after each upload
+VERSION_SHEET = "_Meta"
+VERSION_RANGE = "A1:C1"
+
+# "gsheets" talks to Google Sheets; "local" keeps every tab in a SQLite file so the
+# bot and the dashboard run offline
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "gsheets").lower()
+DATA_DIR = os.getenv("DATA_DIR", "data")
+LOCAL_STORAGE_PATH = os.getenv("LOCAL_STORAGE_PATH", os.path.join(DATA_DIR, "local_sheets.sqlite3"))
+# Simulated API conditions for the local backend
+LOCAL_STORAGE_LATENCY_MS = float(os.getenv("LOCAL_STORAGE_LATENCY_MS", "0"))
+LOCAL_STORAGE_QUOTA_ERROR_RATE = float(os.getenv("LOCAL_STORAGE_QUOTA_ERROR_RATE", "0"))
+LOCAL_STORAGE_QUOTA_PER_MINUTE = int(os.getenv("LOCAL_STORAGE_QUOTA_PER_MINUTE", "0"))
+# Upper bound on cells per values request, keeping request bodies to a few MB
+SHEETS_MAX_CELLS_PER_REQUEST = int(os.getenv("SHEETS_MAX_CELLS_PER_REQUEST", "100000"))
+# Access tokens are refreshed in the background this many seconds before they expire
+TOKEN_REFRESH_MARGIN_S = int(os.getenv("TOKEN_REFRESH_MARGIN_S", "300"))
+
+
+class QuotaExceededError(Exception):
+    """Raised by the local backend to mimic a Sheets 429 'Quota exceeded' response."""
+    status_code = 429
+
+
+class TabNotFoundError(KeyError):
+    """Raised when reading a tab that doesn't exist."""
+
+
+class StorageBackend:
+    """
+    The spreadsheet operations GoogleSheetsService relies on.
+    Rows are lists of cell values with the header first; row numbers are 1-based
+    like the Sheets grid.
+    """
+
+    def write_tab(self, name, rows):
+        """Replaces the whole content of a tab, creating it if needed."""
+        raise NotImplementedError
+
+    def write_tabs(self, tabs):
+        """Replaces several tabs at once. tabs: {name: rows}."""
+        for name, rows in tabs.items():
+            self.write_tab(name, rows)
+
+    def delete_tabs(self, names):
+        """Removes tabs; names that don't exist are ignored."""
+        raise NotImplementedError
+
+    def append_rows(self, name, rows):
+        """Adds rows after the last non-empty row of a tab."""
+        raise NotImplementedError
+
+    def update_rows(self, name, blocks):
+        """Overwrites rows in place. blocks: list of (start_row, rows), starting at column A."""
+        raise NotImplementedError
+
+    def clear_rows(self, name, start_row, end_row):
+        """Blanks out an inclusive range of rows."""
+        raise NotImplementedError
+
+    def read_tab(self, name):
+        """Returns every row of a tab as unformatted values."""
+        raise NotImplementedError
+
+    def read_tabs(self, names):
+        """Returns {name: rows} for the tabs that exist."""
+        tabs = {}
+        for name in names:
+            try:
+                tabs[name] = self.read_tab(name)
+            except TabNotFoundError:
+                continue
+        return tabs
+
+    def read_range(self, name, a1_range):
+        """Returns the rows of an A1 range (e.g. '1:1' or 'F2:F') within a tab."""
+        raise NotImplementedError
+
+    def read_column_ranges(self, names, a1_ranges):
+        """
+        Reads the same single-column A1 ranges (e.g. 'C2:C') from each named tab.
+        Returns: {name: [values per range]} as unformatted values with dates as their
+        displayed text, trailing blanks trimmed.
+        """
+        raise NotImplementedError
+
+    def read_version(self):
+        """Returns the stamped data-version token, or None if it was never set."""
+        raise NotImplementedError
+
+    def write_version(self, token, content_hash, timestamp):
+        raise NotImplementedError
+
+
+def chunk_value_ranges(tabs, max_cells=SHEETS_MAX_CELLS_PER_REQUEST):
+    """
+    Packs {name: rows} into as few values-update requests as possible.
+    Small tabs share a request; a tab larger than max_cells is split into row chunks.
+    Returns: A list of requests, each a list of {"range", "values"} entries.
+    """
+    requests, current, current_cells = [], [], 0
+    for name, rows in tabs.items():
+        width = max(len(rows[0]), 1) if rows else 1
+        start = 0
+        while start < len(rows):
+            take = max((max_cells - current_cells) // width, 0)
+            if take == 0 and current:
+                requests.append(current)
+                current, current_cells = [], 0
+                continue
+            # A single row wider than the budget still goes out on its own
+            chunk = rows[start:start + max(take, 1)]
+            current.append({"range": f"'{name}'!{rowcol_to_a1(start + 1, 1)}", "values": chunk})
+            current_cells += len(chunk) * width
+            start += len(chunk)
+    if current:
+        requests.append(current)
+    return requests
+
+
+def _is_missing_tab(error):
+    """Sheets answers reads of a tab that doesn't exist with a 400 'Unable to parse range'."""
+    return (
+        isinstance(error, gspread.exceptions.APIError)
+        and error.code == 400
+        and "Unable to parse range" in str(error)
+    )
+
+
+class GspreadBackend(StorageBackend):
+    """
+    Google Sheets through gspread. Nothing touches the network until the first call:
+    credentials are loaded, the spreadsheet opened and worksheet handles fetched
+    lazily, then reused for the life of the process.
+    """
+
+    def __init__(self, json_key_path, spreadsheet_id):
+        # Catch configuration mistakes up front without any network call
+        if not spreadsheet_id:
+            raise ValueError("No spreadsheet ID configured (GOOGLE_SHEET_ID).")
+        if not os.path.exists(json_key_path):
+            raise FileNotFoundError(f"Service account key not found: {json_key_path}")
+        self.json_key_path = json_key_path
+        self.spreadsheet_id = spreadsheet_id
+        self.credentials = None
+        self.client = None
+        self._spreadsheet = None
+        self._worksheets = {}
+        self._lock = threading.Lock()
+        self._refresh_timer = None
+
+    @property
+    def spreadsheet(self):
+        if self._spreadsheet is None:
+            with self._lock:
+                if self._spreadsheet is None:
+                    self._connect()
+        return self._spreadsheet
+
+    def _connect(self):
+        # Authenticate once; the client's HTTP session is reused for every later call
+        self.credentials = Credentials.from_service_account_file(self.json_key_path, scopes=SCOPES)
+        self.client = gspread.authorize(self.credentials)
+        self._spreadsheet = self.client.open_by_key(self.spreadsheet_id)
+        logger.info(f"Connected to spreadsheet {self.spreadsheet_id}.")
+        self._schedule_token_refresh()
+
+    def _schedule_token_refresh(self):
+        """Refreshes the access token shortly before it expires so no request pays for it."""
+        expiry = self.credentials.expiry
+        if expiry is None:
+            return
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        delay = max((expiry - now).total_seconds() - TOKEN_REFRESH_MARGIN_S, 60)
+        self._refresh_timer = threading.Timer(delay, self._refresh_token)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _refresh_token(self):
+        try:
+            self.credentials.refresh(Request())
+            logger.info("Refreshed Google Sheets access token.")
+        except Exception as e:
+            # The session still refreshes on demand if this attempt failed
+            logger.warning(f"Background token refresh failed: {e}")
+        self._schedule_token_refresh()
+
+    def close(self):
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+
+    def _worksheet(self, name, create=False, rows="100", cols="20"):
+        worksheet = self._worksheets.get(name)
+        if worksheet is not None:
+            return worksheet
+        try:
+            worksheet = self.spreadsheet.worksheet(name)
+        except gspread.exceptions.WorksheetNotFound:
+            if not create:
+                raise TabNotFoundError(name)
+            logger.info(f"Created new worksheet: {name}")
+            worksheet = self.spreadsheet.add_worksheet(title=name, rows=rows, cols=cols)
+        self._worksheets[name] = worksheet
+        return worksheet
+
+    def _sheet_properties(self):
+        """{title: properties} of every tab, from one metadata read."""
+        metadata = self.spreadsheet.fetch_sheet_metadata(params={"fields": "sheets.properties"})
+        return {sheet["properties"]["title"]: sheet["properties"] for sheet in metadata.get("sheets", [])}
+
+    def write_tab(self, name, rows):
+        self.write_tabs({name: rows})
+
+    def write_tabs(self, tabs):
+        """
+        Rewrites several tabs in a constant number of round trips: one metadata read,
+        one structural batch_update (create missing tabs, clear and resize existing ones
+        to their exact shape) and one values update per SHEETS_MAX_CELLS_PER_REQUEST cells.
+        """
+        existing = self._sheet_properties()
+
+        requests = []
+        for name, rows in tabs.items():
+            grid = {"rowCount": max(len(rows), 1), "columnCount": max(len(rows[0]) if rows else 1, 1)}
+            if name not in existing:
+                requests.append({"addSheet": {"properties": {"title": name, "gridProperties": grid}}})
+                logger.info(f"Created new worksheet: {name}")
+                continue
+            sheet_id = existing[name]["sheetId"]
+            requests.append({"updateCells": {"range": {"sheetId": sheet_id}, "fields": "userEnteredValue"}})
+            requests.append({
+                "updateSheetProperties": {
+                    "properties": {"sheetId": sheet_id, "gridProperties": grid},
+                    "fields": "gridProperties(rowCount,columnCount)",
+                }
+            })
+        if requests:
+            self.spreadsheet.batch_update({"requests": requests})
+        # Cached handles would report the old grid size
+        for name in tabs:
+            self._worksheets.pop(name, None)
+
+        for data in chunk_value_ranges(tabs):
+            self.spreadsheet.values_batch_update({"valueInputOption": "RAW", "data": data})
+
+    def delete_tabs(self, names):
+        existing = self._sheet_properties()
+        requests = [{"deleteSheet": {"sheetId": existing[name]["sheetId"]}} for name in names if name in existing]
+        if requests:
+            self.spreadsheet.batch_update({"requests": requests})
+        for name in names:
+            self._worksheets.pop(name, None)
+
+    def append_rows(self, name, rows):
+        self._worksheet(name).append_rows(rows, value_input_option="RAW")
+
+    def update_rows(self, name, blocks):
+        worksheet = self._worksheet(name)
+        # Make room for rows past the end of the grid in one resize
+        needed_rows = max(start + len(rows) - 1 for start, rows in blocks)
+        if needed_rows > worksheet.row_count:
+            worksheet.add_rows(needed_rows - worksheet.row_count)
+        worksheet.batch_update([
+            {
+                "range": f"{rowcol_to_a1(start, 1)}:{rowcol_to_a1(start + len(rows) - 1, len(rows[0]))}",
+                "values": rows,
+            }
+            for start, rows in blocks
+        ])
+
+    def clear_rows(self, name, start_row, end_row):
+        self._worksheet(name).batch_clear([f"{start_row}:{end_row}"])
+
+    def read_tab(self, name):
+        return self.read_range(name, None)
+
+    def read_tabs(self, names):
+        """
+        One batched read. Sheets fails the whole batch if any tab is missing, so in
+        that case the existing titles are looked up and only those are read again.
+        """
+        try:
+            response = self._batch_get_tabs(names)
+        except gspread.exceptions.APIError as e:
+            if not _is_missing_tab(e):
+                raise
+            existing = self._sheet_properties()
+            names = [name for name in names if name in existing]
+            logger.info(f"Some tabs are missing. Re-reading the {len(names)} that exist.")
+            if not names:
+                return {}
+            response = self._batch_get_tabs(names)
+        return {
+            name: value_range.get("values", [])
+            for name, value_range in zip(names, response.get("valueRanges", []))
+        }
+
+    def _batch_get_tabs(self, names):
+        return self.spreadsheet.values_batch_get(
+            [f"'{name}'" for name in names],
+            params={"valueRenderOption": "UNFORMATTED_VALUE"},
+        )
+
+    def read_range(self, name, a1_range):
+        target = f"'{name}'!{a1_range}" if a1_range else f"'{name}'"
+        try:
+            response = self.spreadsheet.values_get(target, params={"valueRenderOption": "UNFORMATTED_VALUE"})
+        except gspread.exceptions.APIError as e:
+            if _is_missing_tab(e):
+                raise TabNotFoundError(name) from e
+            raise
+        return response.get("values", [])
+
+    def read_column_ranges(self, names, a1_ranges):
+        try:
+            response = self.spreadsheet.values_batch_get(
+                [f"'{name}'!{a1_range}" for name in names for a1_range in a1_ranges],
+                params={
+                    "valueRenderOption": "UNFORMATTED_VALUE",
+                    "dateTimeRenderOption": "FORMATTED_STRING",
+                    "majorDimension": "COLUMNS",
+                },
+            )
+        except gspread.exceptions.APIError as e:
+            if _is_missing_tab(e):
+                raise TabNotFoundError(str(e)) from e
+            raise
+        columns = [next(iter(value_range.get("values", [])), []) for value_range in response.get("valueRanges", [])]
+        width = len(a1_ranges)
+        return {name: columns[i * width:(i + 1) * width] for i, name in enumerate(names)}
+
+    def read_version(self):
+        values = self.spreadsheet.values_get(f"{VERSION_SHEET}!A1").get("values", [])
+        return values[0][0] if values and values[0] else None
+
+    def write_version(self, token, content_hash, timestamp):
+        worksheet = self._worksheet(VERSION_SHEET, create=True, rows="1", cols="3")
+        worksheet.update([[token, content_hash, timestamp]], VERSION_RANGE)
+
+
+class LocalBackend(StorageBackend):
+    """
+    In-process stand-in for Google Sheets backed by a SQLite file, one row per sheet row.
+    latency_ms is slept before every call, quota_error_rate is the share of calls
+    that fail with QuotaExceededError, and quota_per_minute rejects calls beyond that
+    many per quota_window_s, to mimic the real API under load.
+    """
+
+    def __init__(self, path=LOCAL_STORAGE_PATH, latency_ms=LOCAL_STORAGE_LATENCY_MS,
+                 quota_error_rate=LOCAL_STORAGE_QUOTA_ERROR_RATE,
+                 quota_per_minute=LOCAL_STORAGE_QUOTA_PER_MINUTE, quota_window_s=60, seed=None):
+        self.path = path
+        self.latency_ms = latency_ms
+        self.quota_error_rate = quota_error_rate
+        self.quota_per_minute = quota_per_minute
+        self.quota_window_s = quota_window_s
+        self._accepted = deque()
+        self.calls = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS tabs (tab TEXT PRIMARY KEY)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cells ("
+                "tab TEXT NOT NULL, row INTEGER NOT NULL, vals TEXT NOT NULL, PRIMARY KEY (tab, row))"
+            )
+
+    def _connect(self):
+        # One connection per call keeps the backend safe to share across worker threads
+        return closing(sqlite3.connect(self.path, timeout=30))
+
+    def _call(self, operation):
+        """Records the call and applies the simulated latency and quota errors."""
+        with self._lock:
+            self.calls[operation] += 1
+            fail = self.quota_error_rate > 0 and self._random.random() < self.quota_error_rate
+            if self.quota_per_minute and not fail:
+                now = time.monotonic()
+                while self._accepted and now - self._accepted[0] >= self.quota_window_s:
+                    self._accepted.popleft()
+                fail = len(self._accepted) >= self.quota_per_minute
+                if not fail:
+                    self._accepted.append(now)
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        if fail:
+            raise QuotaExceededError(f"Quota exceeded (simulated) on {operation}")
+
+    def _put_rows(self, conn, name, start_row, rows):
+        conn.execute("INSERT OR IGNORE INTO tabs (tab) VALUES (?)", (name,))
+        conn.executemany(
+            "INSERT OR REPLACE INTO cells (tab, row, vals) VALUES (?, ?, ?)",
+            [(name, start_row + i, json.dumps(row, default=str)) for i, row in enumerate(rows)],
+        )
+
+    def _get_rows(self, conn, name, start_row=1, end_row=None):
+        """Returns rows start_row..end_row (inclusive, 1-based; None reads to the end)."""
+        if conn.execute("SELECT 1 FROM tabs WHERE tab = ?", (name,)).fetchone() is None:
+            raise TabNotFoundError(name)
+        stored = conn.execute(
+            "SELECT row, vals FROM cells WHERE tab = ? AND row >= ? AND row <= ? ORDER BY row",
+            (name, start_row, end_row if end_row is not None else 2**62),
+        ).fetchall()
+        rows = []
+        for row, vals in stored:
+            # Gaps left by cleared rows read back as empty rows, as in Sheets
+            rows.extend([] for _ in range(row - start_row - len(rows)))
+            rows.append(json.loads(vals))
+        return rows
+
+    def _read_grid(self, conn, name, a1_range):
+        """Returns (rows, grid) for an A1 range, fetching only the rows it covers."""
+        grid = a1_range_to_grid_range(a1_range)
+        start = grid.get("startRowIndex", 0)
+        end = grid.get("endRowIndex")
+        return self._get_rows(conn, name, start + 1, end), grid
+
+    def write_tab(self, name, rows):
+        self.write_tabs({name: rows}, operation="write_tab")
+
+    def write_tabs(self, tabs, operation="write_tabs"):
+        self._call(operation)
+        with self._connect() as conn, conn:
+            for name, rows in tabs.items():
+                conn.execute("DELETE FROM cells WHERE tab = ?", (name,))
+                self._put_rows(conn, name, 1, rows)
+
+    def delete_tabs(self, names):
+        self._call("delete_tabs")
+        with self._connect() as conn, conn:
+            for name in names:
+                conn.execute("DELETE FROM cells WHERE tab = ?", (name,))
+                conn.execute("DELETE FROM tabs WHERE tab = ?", (name,))
+
+    def append_rows(self, name, rows):
+        self._call("append_rows")
+        with self._connect() as conn, conn:
+            last_row = conn.execute("SELECT MAX(row) FROM cells WHERE tab = ?", (name,)).fetchone()[0]
+            self._put_rows(conn, name, (last_row or 0) + 1, rows)
+
+    def update_rows(self, name, blocks):
+        self._call("update_rows")
+        with self._connect() as conn, conn:
+            for start, rows in blocks:
+                self._put_rows(conn, name, start, rows)
+
+    def clear_rows(self, name, start_row, end_row):
+        self._call("clear_rows")
+        with self._connect() as conn, conn:
+            conn.execute("DELETE FROM cells WHERE tab = ? AND row BETWEEN ? AND ?", (name, start_row, end_row))
+
+    def read_tab(self, name):
+        self._call("read_tab")
+        with self._connect() as conn:
+            return self._get_rows(conn, name)
+
+    def read_tabs(self, names):
+        self._call("read_tabs")
+        tabs = {}
+        with self._connect() as conn:
+            for name in names:
+                try:
+                    tabs[name] = self._get_rows(conn, name)
+                except TabNotFoundError:
+                    continue
+        return tabs
+
+    def read_range(self, name, a1_range):
+        self._call("read_range")
+        with self._connect() as conn:
+            rows, grid = self._read_grid(conn, name, a1_range)
+        rows = [row[grid.get("startColumnIndex", 0):grid.get("endColumnIndex")] for row in rows]
+        # Sheets trims trailing empty rows from value ranges
+        while rows and not rows[-1]:
+            rows.pop()
+        return rows
+
+    def read_column_ranges(self, names, a1_ranges):
+        self._call("read_column_ranges")
+        grids = [a1_range_to_grid_range(a1_range) for a1_range in a1_ranges]
+        tabs = {}
+        with self._connect() as conn:
+            for name in names:
+                # Rows are decoded once per distinct row span (normally every range shares one)
+                spans = {}
+                columns = []
+                for a1_range, grid in zip(a1_ranges, grids):
+                    span = (grid.get("startRowIndex", 0), grid.get("endRowIndex"))
+                    if span not in spans:
+                        spans[span] = self._read_grid(conn, name, a1_range)[0]
+                    col = grid.get("startColumnIndex", 0)
+                    values = [row[col] if col < len(row) else '' for row in spans[span]]
+                    while values and values[-1] == '':
+                        values.pop()
+                    columns.append(values)
+                tabs[name] = columns
+        return tabs
+
+    def read_version(self):
+        try:
+            values = self.read_range(VERSION_SHEET, "A1")
+        except TabNotFoundError:
+            return None
+        return values[0][0] if values and values[0] else None
+
+    def write_version(self, token, content_hash, timestamp):
+        self.write_tab(VERSION_SHEET, [[token, content_hash, timestamp]])
+
+
+def create_backend(json_key_path, spreadsheet_id):
+    """Builds the backend selected by STORAGE_BACKEND."""
+    if STORAGE_BACKEND == "local":
+        logger.info(f"Using local storage backend at {LOCAL_STORAGE_PATH}.")
+        return LocalBackend()
+    return GspreadBackend(json_key_path, spreadsheet_id)
@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+import tracemalloc
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Finished spans kept in memory for /stats (oldest dropped first)
+TRACE_HISTORY_SIZE = int(os.getenv("TRACE_HISTORY_SIZE", "500"))
+# Python-heap peak per span via tracemalloc. Off by default: tracing allocations slows the pipeline
+TRACE_MEMORY = os.getenv("TRACE_MEMORY", "false").lower() in ("1", "true", "yes")
+
+_history = deque(maxlen=TRACE_HISTORY_SIZE)
+_history_lock = threading.Lock()
+_run_id = contextvars.ContextVar("trace_run_id", default=None)
+
+if TRACE_MEMORY:
+    tracemalloc.start()
+
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_mb():
+    """Current resident set size of the process (not its lifetime peak), or None off Linux."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return round(int(f.read().split()[1]) * _PAGE_SIZE / 2**20, 1)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def record_span(stage, seconds, **fields):
+    """
+    Stores a finished span and logs it as one JSON line. fields carries whatever the
+    stage knows about its work (rows_in, rows_out, bytes, ...); None values are dropped.
+    rss_mb is the process RSS when the span ended.
+    """
+    record = {
+        "span": stage,
+        "run": _run_id.get(),
+        "ts": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        "ms": round(seconds * 1000, 1),
+        "rss_mb": _rss_mb(),
+        "ok": True,
+    }
+    record.update({key: value for key, value in fields.items() if value is not None})
+    with _history_lock:
+        _history.append(record)
+    logger.info(json.dumps(record))
+    return record
+
+
+@contextmanager
+def span(stage, **fields):
+    """
+    Times a pipeline stage. Yields a dict the stage can fill in as it learns
+    rows_out, bytes and so on. The span is recorded even when the stage raises,
+    with ok=False. rss_delta_mb is how much the process RSS grew (or shrank) over
+    the stage. With TRACE_MEMORY the stage's Python-heap peak is added as
+    py_heap_peak_mb. Both are process-wide, so approximate when jobs overlap.
+    """
+    if TRACE_MEMORY:
+        tracemalloc.reset_peak()
+    rss_start = _rss_mb()
+    start = time.perf_counter()
+    ok = True
+    try:
+        yield fields
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        rss_end = _rss_mb()
+        if rss_start is not None and rss_end is not None:
+            fields["rss_delta_mb"] = round(rss_end - rss_start, 1)
+        if TRACE_MEMORY:
+            fields["py_heap_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        record_span(stage, elapsed, ok=ok, **fields)
+
+
+def new_run_id():
+    return uuid.uuid4().hex[:8]
+
+
+@contextmanager
+def run_scope(run_id):
+    """Attributes the spans recorded inside to run_id, e.g. the download before a job is queued."""
+    token = _run_id.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _run_id.reset(token)
+
+
+@contextmanager
+def trace_run(run_id=None, **fields):
+    """
+    Groups the spans of one pipeline run under a run id and records the run as a 'total' span.
+    Pass the run_id of spans recorded before the job reached its worker thread to join them.
+    """
+    with run_scope(run_id or new_run_id()), span("total", **fields) as total:
+        yield total
+
+
+def stage_stats():
+    """
+    p50/p95 wall time per stage over the recent span history, in first-seen order.
+    Returns: {stage: {"count", "p50_ms", "p95_ms"}}
+    """
+    with _history_lock:
+        spans = list(_history)
+
+    durations = {}
+    for record in spans:
+        durations.setdefault(record["span"], []).append(record["ms"])
+    stats = {}
+    for stage, values in durations.items():
+        values.sort()
+        stats[stage] = {
+            "count": len(values),
+            "p50_ms": values[len(values) // 2],
+            "p95_ms": values[min(int(len(values) * 0.95), len(values) - 1)],
+        }
+    return stats
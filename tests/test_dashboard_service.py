@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.dashboard_service import downsample_series, MIN_TRACE_POINTS
+
+
+def _series(sizes, seed=0):
+    """One random-walk trace per group, sorted by day within each group."""
+    rng = np.random.default_rng(seed)
+    frames = [
+        pd.DataFrame({
+            "Date": pd.date_range("2024-01-01", periods=size, freq="D"),
+            "Total": rng.normal(10, 5, size).cumsum(),
+            "Country": f"C{i}",
+        })
+        for i, size in enumerate(sizes)
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_downsample_series_never_exceeds_the_budget(seed):
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(1, rng.choice([6, 60, 600]), rng.integers(1, 150))
+    max_points = int(rng.integers(10, 400))
+    df = _series(sizes, seed)
+    level = float(df["Total"].median()) if seed % 2 else None
+
+    out = downsample_series(df, "Date", "Total", max_points, level=level, group="Country")
+
+    assert len(out) <= max_points
+    assert out.index.is_monotonic_increasing
+
+
+def test_downsample_series_many_small_groups():
+    # Proportional shares rounded up to the per-trace minimum used to overshoot the budget
+    df = _series([4] * 100 + [400], seed=1)
+    out = downsample_series(df, "Date", "Total", 350, group="Country")
+    assert len(out) <= 350
+    assert out["Country"].nunique() == 101
+
+
+def test_downsample_series_keeps_short_groups_whole():
+    df = _series([2, MIN_TRACE_POINTS, 1000], seed=2)
+    out = downsample_series(df, "Date", "Total", 50, group="Country")
+    assert len(out) <= 50
+    counts = out["Country"].value_counts()
+    assert (counts["C0"], counts["C1"]) == (2, MIN_TRACE_POINTS)
+
+
+def test_downsample_series_keeps_the_level_crossing():
+    df = _series([5000], seed=3)
+    level = float(df["Total"].quantile(0.5))
+    first_above = df.index[df["Total"] >= level][0]
+    out = downsample_series(df, "Date", "Total", 100, level=level)
+    assert len(out) <= 100
+    assert {first_above - 1, first_above} <= set(out.index)
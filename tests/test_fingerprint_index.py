@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from services.fingerprint_index import FingerprintIndex, FIRST_DATA_ROW, contiguous_blocks
+
+
+def _sheet_of(fingerprints):
+    """Stand-in for the tab: sheet row -> fingerprint, as the last upload left it."""
+    return {FIRST_DATA_ROW + i: fp for i, fp in enumerate(fingerprints)}
+
+
+def _apply(sheet, fingerprints):
+    """Plans an upload of fingerprints and applies it the way _write_incremental does."""
+    index = FingerprintIndex("Cleaned_Data", ["Fingerprint"], {fp: row for row, fp in sheet.items()})
+    assignments, old_last_row, new_index = index.plan(fingerprints)
+    sheet = dict(sheet)
+    for row, pos in assignments.items():
+        sheet[row] = fingerprints[pos]
+    last_row = FIRST_DATA_ROW + len(fingerprints) - 1
+    for row in range(last_row + 1, old_last_row + 1):
+        sheet.pop(row, None)
+    return sheet, assignments, new_index
+
+
+def _assert_dense(sheet, fingerprints, new_index):
+    rows = sorted(sheet)
+    assert rows == list(range(FIRST_DATA_ROW, FIRST_DATA_ROW + len(fingerprints)))
+    assert sorted(sheet.values()) == sorted(fingerprints)
+    assert new_index.rows == {fp: row for row, fp in sheet.items()}
+
+
+def test_plan_unchanged_export_writes_nothing():
+    old = ["a", "b", "c"]
+    sheet, assignments, new_index = _apply(_sheet_of(old), old)
+    assert assignments == {}
+    _assert_dense(sheet, old, new_index)
+
+
+def test_plan_appends_new_rows_at_the_end():
+    new = ["a", "b", "c", "d", "e"]
+    sheet, assignments, new_index = _apply(_sheet_of(["a", "b", "c"]), new)
+    assert sorted(assignments) == [5, 6]
+    _assert_dense(sheet, new, new_index)
+
+
+def test_plan_edit_rewrites_the_row_in_place():
+    new = ["a", "B", "c"]
+    sheet, assignments, new_index = _apply(_sheet_of(["a", "b", "c"]), new)
+    assert assignments == {3: 1}
+    _assert_dense(sheet, new, new_index)
+
+
+def test_plan_delete_moves_bottom_rows_up_and_trims_the_tail():
+    new = ["b", "d", "e"]
+    sheet, assignments, new_index = _apply(_sheet_of(["a", "b", "c", "d", "e"]), new)
+    assert len(assignments) == 2
+    _assert_dense(sheet, new, new_index)
+
+
+def test_plan_delete_everything():
+    sheet, assignments, new_index = _apply(_sheet_of(["a", "b"]), [])
+    assert assignments == {}
+    _assert_dense(sheet, [], new_index)
+
+
+def test_plan_deletes_and_inserts_fill_holes_first():
+    new = ["x", "b", "y", "d", "z"]
+    sheet, assignments, new_index = _apply(_sheet_of(["a", "b", "c", "d"]), new)
+    assert sorted(assignments) == [2, 4, 6]
+    _assert_dense(sheet, new, new_index)
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_plan_random_edits_keep_the_tab_dense(seed):
+    rng = random.Random(seed)
+    old = [f"fp{i}" for i in range(rng.randint(0, 60))]
+    kept = [fp for fp in old if rng.random() > 0.3]
+    added = [f"new{i}" for i in range(rng.randint(0, 40))]
+    new = kept + added
+    rng.shuffle(new)
+
+    sheet, _, new_index = _apply(_sheet_of(old), new)
+    _assert_dense(sheet, new, new_index)
+
+    # A second upload of the same export is a no-op
+    _, assignments, _ = _apply(sheet, new)
+    assert assignments == {}
+
+
+def test_contiguous_blocks():
+    assert contiguous_blocks([]) == []
+    assert contiguous_blocks([7, 2, 3, 4, 9, 10]) == [(2, 4), (7, 7), (9, 10)]
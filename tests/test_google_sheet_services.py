@@ -0,0 +1,97 @@
+import time
+import threading
+
+import pytest
+
+from services import google_sheet_services
+from services.google_sheet_services import RequestScheduler
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _flaky(*statuses, result="ok"):
+    """A call that fails with the given HTTP statuses, in order, then returns result."""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= len(statuses):
+            raise FakeAPIError(statuses[len(calls) - 1])
+        return result
+    return fn, calls
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records backoff sleeps instead of waiting, with the jitter pinned to its upper bound."""
+    recorded = []
+    monkeypatch.setattr(google_sheet_services.time, "sleep", recorded.append)
+    monkeypatch.setattr(google_sheet_services.random, "uniform", lambda low, high: high)
+    return recorded
+
+
+def _scheduler(**kwargs):
+    return RequestScheduler(requests_per_minute=1e9, burst=1000, **kwargs)
+
+
+def test_retries_transient_errors_with_exponential_backoff(sleeps):
+    scheduler = _scheduler(max_retries=5, backoff_base_s=1, backoff_max_s=5)
+    fn, calls = _flaky(429, 503, 500, 429)
+    assert scheduler.call("read_tab", fn) == "ok"
+    assert len(calls) == 5
+    assert sleeps == [1, 2, 4, 5]
+    stats = scheduler.stats()["read_tab"]
+    assert (stats["calls"], stats["retries"], stats["failures"]) == (1, 4, 0)
+
+
+def test_gives_up_after_max_retries(sleeps):
+    scheduler = _scheduler(max_retries=2, backoff_base_s=1)
+    fn, calls = _flaky(429, 429, 429)
+    with pytest.raises(FakeAPIError):
+        scheduler.call("write_tabs", fn)
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+    assert scheduler.stats()["write_tabs"]["failures"] == 1
+
+
+@pytest.mark.parametrize("status", [400, 403, 404, None])
+def test_does_not_retry_other_errors(sleeps, status):
+    scheduler = _scheduler()
+    fn, calls = _flaky(status)
+    with pytest.raises(FakeAPIError):
+        scheduler.call("read_tab", fn)
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+def test_coalesces_identical_concurrent_reads():
+    scheduler = _scheduler()
+    release = threading.Event()
+    calls = []
+
+    def read(name):
+        calls.append(name)
+        release.wait(5)
+        return [["header"]]
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(scheduler.call("read_tab", read, "Summary", coalesce=True)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    # Hold the leader's call in flight until the other three have joined it
+    deadline = time.monotonic() + 5
+    while scheduler.stats().get("read_tab", {}).get("coalesced", 0) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == ["Summary"]
+    assert results == [[["header"]]] * 4
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import fingerprint_index
+from services.google_sheet_services import GoogleSheetsService, RequestScheduler
+from services.partitioning import (
+    plan_partition_upload,
+    read_partitions,
+    partition_tab,
+    PARTITION_INDEX_TAB,
+    UNPARTITIONED_TAB,
+)
+from services.storage_backends import LocalBackend
+from transformations.data_transformations import (
+    format_for_sheets,
+    process_main_data,
+    CSV_SCHEMA,
+    DATE_COL,
+    AMOUNT_COL,
+    CATEGORY_COL,
+    COUNTRY_COL,
+)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(fingerprint_index, "INDEX_DIR", str(tmp_path / "index"))
+    return GoogleSheetsService(
+        backend=LocalBackend(str(tmp_path / "sheets.sqlite3"), latency_ms=0, quota_error_rate=0, quota_per_minute=0),
+        scheduler=RequestScheduler(requests_per_minute=1e9, burst=10**6),
+    )
+
+
+def _cleaned(rows=600, seed=5):
+    """A Sheets-formatted 'Cleaned_Data' frame spread over January to April 2024."""
+    rng = np.random.default_rng(seed)
+    raw = pd.DataFrame({
+        DATE_COL: (pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 120, rows), unit='D')).strftime('%Y-%m-%d'),
+        AMOUNT_COL: rng.lognormal(3, 1, rows).round(2).astype(str),
+        CATEGORY_COL: rng.choice(['Food', 'Hotel', 'Transport'], rows),
+        COUNTRY_COL: rng.choice(['Spain', 'Japan'], rows),
+    }).astype(CSV_SCHEMA)
+    return format_for_sheets(process_main_data(raw))
+
+
+def _publish(service, df):
+    tabs, stale_tabs = plan_partition_upload(service, df)
+    assert service.write_dataframes_to_sheets(tabs) == []
+    if stale_tabs:
+        assert service.delete_sheets(stale_tabs)
+    return tabs, stale_tabs
+
+
+def test_first_upload_writes_every_month_and_retires_the_single_tab(service):
+    service.write_dataframes_to_sheets({UNPARTITIONED_TAB: _cleaned(50)})
+    tabs, stale_tabs = _publish(service, _cleaned())
+    assert sorted(tabs) == [partition_tab(m) for m in ["2024-01", "2024-02", "2024-03", "2024-04"]] + [PARTITION_INDEX_TAB]
+    assert stale_tabs == [UNPARTITIONED_TAB]
+    assert service.read_sheet_to_dataframe(UNPARTITIONED_TAB).empty
+
+
+def test_unchanged_upload_only_rewrites_the_index(service):
+    df = _cleaned()
+    _publish(service, df)
+    tabs, stale_tabs = plan_partition_upload(service, df)
+    assert list(tabs) == [PARTITION_INDEX_TAB]
+    assert stale_tabs == []
+
+
+def test_changed_and_removed_months(service):
+    df = _cleaned()
+    _publish(service, df)
+
+    changed = df[df['Month'] != '2024-01'].reset_index(drop=True)
+    changed.loc[changed.index[changed['Month'] == '2024-03'][0], 'Amount'] += 1
+    tabs, stale_tabs = plan_partition_upload(service, changed)
+    assert sorted(tabs) == [partition_tab("2024-03"), PARTITION_INDEX_TAB]
+    assert stale_tabs == [partition_tab("2024-01")]
+
+
+def test_read_partitions_reads_only_the_requested_months(service):
+    df = _cleaned()
+    _publish(service, df)
+
+    recent = read_partitions(service, ['Date', 'Amount'], months=["2024-03", "2024-04"])
+    expected = df[df['Month'].isin(["2024-03", "2024-04"])]
+    assert list(recent.columns) == ['Date', 'Amount']
+    assert len(recent) == len(expected)
+    assert sorted(recent['Date']) == sorted(expected['Date'])
+    assert read_partitions(service, ['Date'], months=["2023-12"]).empty
+    assert len(read_partitions(service, ['Date'])) == len(df)
+
+
+def test_read_partitions_without_an_index(service):
+    assert read_partitions(service, ['Date']) is None
@@ -0,0 +1,58 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from services import result_cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "RESULT_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _processed(rows):
+    canonical = pd.DataFrame({"Amount": pd.Series(range(rows), dtype="int64")})
+    tabs = {"Cleaned_Data": pd.DataFrame({"Amount": [i / 100 for i in range(rows)]}), "Summary_Totals": pd.DataFrame({"Total": [1.0]})}
+    return canonical, tabs
+
+
+def test_store_and_load_round_trip(cache_dir):
+    canonical, tabs = _processed(10)
+    result_cache.store_result("k" * 64, canonical, tabs)
+    loaded_canonical, loaded_tabs = result_cache.load_result("k" * 64)
+    pd.testing.assert_frame_equal(loaded_canonical, canonical)
+    assert list(loaded_tabs) == list(tabs)
+    pd.testing.assert_frame_equal(loaded_tabs["Cleaned_Data"], tabs["Cleaned_Data"])
+
+
+def test_concurrent_stores_of_the_same_key_leave_one_complete_entry(cache_dir):
+    canonical, tabs = _processed(20_000)
+    errors = []
+
+    def store():
+        try:
+            result_cache.store_result("a" * 64, canonical, tabs)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=store) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert os.listdir(cache_dir) == ["a" * 64]
+    loaded_canonical, _ = result_cache.load_result("a" * 64)
+    pd.testing.assert_frame_equal(loaded_canonical, canonical)
+
+
+def test_failed_store_leaves_no_temporary_directory(cache_dir):
+    canonical, tabs = _processed(3)
+    with pytest.raises(Exception):
+        result_cache.store_result("b" * 64, canonical, {"Bad": pd.DataFrame({"x": [object()]})})
+    assert os.listdir(cache_dir) == []
+    assert result_cache.load_result("b" * 64) is None
@@ -0,0 +1,42 @@
+import pytest
+
+from services.storage_backends import chunk_value_ranges
+
+
+def _tab(rows, width=3, prefix="r"):
+    return [[f"{prefix}{r}c{c}" for c in range(width)] for r in range(rows)]
+
+
+def _rows_by_tab(requests):
+    """Reassembles each tab from the packed requests, checking every chunk starts where the last ended."""
+    tabs = {}
+    for request in requests:
+        for entry in request:
+            name, cell = entry["range"].rsplit("!", 1)
+            rows = tabs.setdefault(name.strip("'"), [])
+            assert cell == f"A{len(rows) + 1}"
+            rows.extend(entry["values"])
+    return tabs
+
+
+def test_chunk_value_ranges_packs_small_tabs_into_one_request():
+    tabs = {"Summary_A": _tab(4), "Summary_B": _tab(2), "Summary_C": _tab(5)}
+    requests = chunk_value_ranges(tabs, max_cells=100)
+    assert len(requests) == 1
+    assert _rows_by_tab(requests) == tabs
+
+
+@pytest.mark.parametrize("max_cells", [3, 7, 30, 31, 299])
+def test_chunk_value_ranges_splits_large_tabs_within_the_budget(max_cells):
+    tabs = {"Cleaned_Data": _tab(100), "Summary_A": _tab(7, width=2, prefix="s"), "Empty": []}
+    requests = chunk_value_ranges(tabs, max_cells=max_cells)
+    for request in requests:
+        assert sum(len(entry["values"]) * len(entry["values"][0]) for entry in request) <= max_cells
+    assert _rows_by_tab(requests) == {name: rows for name, rows in tabs.items() if rows}
+
+
+def test_chunk_value_ranges_sends_a_row_wider_than_the_budget_alone():
+    tabs = {"Wide": _tab(3, width=10)}
+    requests = chunk_value_ranges(tabs, max_cells=4)
+    assert [len(request) for request in requests] == [1, 1, 1]
+    assert _rows_by_tab(requests) == tabs
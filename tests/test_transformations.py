@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from transformations import data_transformations
+from transformations.data_transformations import (
+    apply_canonical_schema,
+    build_spend_cube,
+    format_for_sheets,
+    parse_amount_cents,
+    process_main_data,
+    CSV_SCHEMA,
+    DATE_COL,
+    AMOUNT_COL,
+    CATEGORY_COL,
+    COUNTRY_COL,
+)
+
+
+@pytest.mark.parametrize("text, cents", [
+    ("12.34", 1234),
+    ("7", 700),
+    ("0.1", 10),
+    ("€1.234,56", 123456),
+    ("1,234.5", 123450),
+    ("12,50", 1250),
+    ("(12.00)", -1200),
+    ("-3.10", -310),
+])
+def test_parse_amount_cents_formats(text, cents):
+    assert parse_amount_cents(pd.Series([text], dtype="str")).tolist() == [cents]
+
+
+@pytest.mark.parametrize("text, cents", [
+    ("1.234", 123),
+    ("1.235", 124),
+    ("-1.235", -124),
+    ("0.005", 1),
+    ("1,2345", 123),
+    ("999999999999.999", 100000000000000),
+])
+def test_parse_amount_cents_rounds_extra_decimals_exactly(text, cents):
+    assert parse_amount_cents(pd.Series([text], dtype="str")).tolist() == [cents]
+
+
+@pytest.mark.parametrize("text", ["1e3", "1E+3", "2.5e-1", "n/a", ""])
+def test_parse_amount_cents_rejects_non_decimals(text):
+    assert parse_amount_cents(pd.Series([text], dtype="str")).isna().all()
+
+
+def test_parse_amount_cents_mixed_column_keeps_row_order():
+    amounts = pd.Series(["1.50", "1e3", "€2,00", None, "1.239"], dtype="str")
+    assert parse_amount_cents(amounts).tolist() == [150, pd.NA, 200, pd.NA, 124]
+
+
+def test_parse_amount_cents_numeric_input():
+    assert parse_amount_cents(pd.Series([1.5, 20.0])).tolist() == [150, 2000]
+
+
+def _canonical_frame(rows=2_000, seed=3):
+    rng = np.random.default_rng(seed)
+    raw = pd.DataFrame({
+        DATE_COL: (pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 120, rows), unit='D')).strftime('%Y-%m-%d'),
+        AMOUNT_COL: rng.lognormal(3, 1, rows).round(2).astype(str),
+        CATEGORY_COL: rng.choice(['Food', 'Hotel', 'Transport', 'Flights', 'Health'], rows),
+        COUNTRY_COL: rng.choice(['Spain', 'Ireland', 'Japan'], rows),
+    }).astype(CSV_SCHEMA)
+    return process_main_data(raw)
+
+
+CALCULATE_FUNCTIONS = sorted(
+    name for name, value in vars(data_transformations).items()
+    if name.startswith('calculate_') and callable(value)
+)
+
+
+@pytest.mark.parametrize("name", CALCULATE_FUNCTIONS)
+@pytest.mark.parametrize("as_cube", [False, True], ids=["frame", "cube"])
+def test_calculate_functions_do_not_mutate_input(name, as_cube):
+    frame = _canonical_frame()
+    if as_cube:
+        frame = build_spend_cube(frame)
+    before = frame.copy(deep=True)
+    getattr(data_transformations, name)(frame)
+    pd.testing.assert_frame_equal(frame, before)
+
+
+@pytest.mark.parametrize("convert", [apply_canonical_schema, format_for_sheets])
+def test_schema_conversions_do_not_mutate_input(convert):
+    frame = _canonical_frame()
+    before = frame.copy(deep=True)
+    convert(frame)
+    pd.testing.assert_frame_equal(frame, before)
@@ -1,6 +1,5 @@
 import pandas as pd
 import logging
-import os
 from datetime import date, timedelta
 
 # --- CONSTANTS ---
@@ -10,8 +9,155 @@ CATEGORY_COL = 'category'
 COUNTRY_COL = 'country' # Added this to match your functions
 EXCLUDE_CATEGORY = 'Flights'
 
+# Canonical frame: money is held as int64 cents, dimensions as categoricals
+CENTS_PER_UNIT = 100
+CATEGORICAL_COLS = ['Category', 'Country', 'Month']
+# Columns every summary builder needs; reads from Sheets are projected to these
+ANALYSIS_COLS = ['Date', 'Amount', 'Category', 'Country']
+
+# Amount strings that need no cleaning beyond a numeric cast (a float is exact to the cent here)
+PLAIN_AMOUNT_PATTERN = r'-?\d+(?:\.\d{1,2})?'
+# Any plain decimal; those with more than two decimals are rounded digit by digit
+DECIMAL_AMOUNT_PATTERN = r'(-?)(\d+)(?:\.(\d+))?'
+# Scientific notation ('1e3') is never a money amount in an export, so it is rejected
+EXPONENT_AMOUNT_PATTERN = r'\d\s*[eE][+-]?\d'
+
+# Compiled Travel Spend schema: the only export columns the pipeline reads.
+# Everything is loaded as text and typed explicitly during cleaning.
+CSV_SCHEMA = {
+    DATE_COL: 'str',
+    AMOUNT_COL: 'str',
+    CATEGORY_COL: 'str',
+    COUNTRY_COL: 'str',
+}
+
 logger = logging.getLogger(__name__)
 
+def _normalise_amount_text(text):
+    """
+    Rewrites messy amount strings ('€1.234,56', '(12.00)', '1,234.5') into plain
+    '1234.56' form using vectorised string ops only.
+    The last '.' or ',' is the decimal separator when it can only be one:
+    a single '.', or a single ',' not followed by exactly three digits (which
+    would read as a thousands group, as in '1,234'). Every other separator is
+    a thousands separator and is dropped.
+    """
+    text = text.str.strip()
+    negative = text.str.startswith('-') | text.str.endswith('-') | (
+        text.str.startswith('(') & text.str.endswith(')')
+    )
+    digits = text.str.replace(r'[^\d.,]', '', regex=True)
+
+    sep_pos = pd.concat([digits.str.rfind('.'), digits.str.rfind(',')], axis=1).max(axis=1)
+    frac_len = digits.str.len() - sep_pos - 1
+    dots = digits.str.count(r'\.')
+    commas = digits.str.count(',')
+    last_is_dot = digits.str.rfind('.') == sep_pos
+
+    is_decimal = (sep_pos >= 0) & (
+        (last_is_dot & (dots == 1))
+        | (~last_is_dot & (commas == 1) & ((frac_len != 3) | (dots > 0)))
+    )
+
+    marked = digits.where(~is_decimal, digits.str.replace(r'[.,](?=\d*$)', 'D', regex=True))
+    plain = marked.str.replace(r'[.,]', '', regex=True).str.replace('D', '.', regex=False)
+    return plain.where(~negative, '-' + plain)
+
+def _plain_text_to_cents(text):
+    """Bulk Arrow cast of decimals with at most two decimals; float rounding is exact at that precision."""
+    return (text.astype('float64[pyarrow]').astype('float64') * 100).round().astype('Int64')
+
+def _decimal_text_to_cents(text):
+    """
+    Exact cents for plain decimal strings ('-12.345'), rounding half away from zero
+    on the third decimal digit instead of going through a float. Anything else -> <NA>.
+    """
+    parts = text.str.extract(f'^{DECIMAL_AMOUNT_PATTERN}$')
+    fraction = parts[2].fillna('').str.pad(3, side='right', fillchar='0')
+    cents = (
+        pd.to_numeric(parts[1]).astype('Int64') * CENTS_PER_UNIT
+        + pd.to_numeric(fraction.str[:2]).astype('Int64')
+        + (pd.to_numeric(fraction.str[2]) >= 5).astype('Int64')
+    )
+    return cents.where(parts[0] != '-', -cents)
+
+def parse_amount_cents(amounts):
+    """
+    Parses an amount column into integer cents (nullable Int64; unparseable -> <NA>).
+    Fast path: numeric columns are scaled directly with no string round trip.
+    Strings that are already plain decimals with at most two decimals are cast in bulk
+    through Arrow. The remainder (currency symbols, thousands separators, decimal commas)
+    is normalised and converted exactly; more than two decimals are rounded to the
+    nearest cent and exponent notation is rejected, both with a warning.
+    """
+    if pd.api.types.is_numeric_dtype(amounts):
+        return (amounts.astype('float64') * 100).round().astype('Int64')
+
+    text = amounts.astype('string')
+    plain = text.str.fullmatch(PLAIN_AMOUNT_PATTERN).fillna(False).astype(bool)
+    if not (~plain & text.notna()).any():
+        return _plain_text_to_cents(text)
+
+    cents = pd.Series(pd.NA, index=amounts.index, dtype='Int64')
+    cents[plain] = _plain_text_to_cents(text[plain])
+
+    messy = text[~plain & text.notna()]
+    exponent = messy.str.contains(EXPONENT_AMOUNT_PATTERN)
+    if exponent.any():
+        logger.warning(f"⚠️ Rejected {int(exponent.sum())} amounts in exponent notation, e.g. '{messy[exponent].iloc[0]}'.")
+        messy = messy[~exponent]
+
+    normalised = _normalise_amount_text(messy)
+    cent_exact = normalised.str.fullmatch(PLAIN_AMOUNT_PATTERN).fillna(False).astype(bool)
+    cents[cent_exact.index[cent_exact]] = _plain_text_to_cents(normalised[cent_exact])
+    rounded = ~cent_exact & normalised.str.fullmatch(DECIMAL_AMOUNT_PATTERN).fillna(False).astype(bool)
+    if rounded.any():
+        logger.warning(f"⚠️ Rounded {int(rounded.sum())} amounts with more than two decimals to the nearest cent, e.g. '{messy[rounded].iloc[0]}'.")
+        cents[rounded.index[rounded]] = _decimal_text_to_cents(normalised[rounded])
+    return cents
+
+def cents_to_currency(amounts):
+    """Converts integer cents back to currency units (e.g. euros) for display and export."""
+    return amounts / CENTS_PER_UNIT
+
+def apply_canonical_schema(df):
+    """
+    Coerces a frame to the canonical dtypes in one vectorised step:
+    Date -> day-resolution datetime64, Amount -> int64 cents, dimensions -> categorical.
+    Idempotent, so it is safe on frames read back from Sheets (text dates, amounts in
+    currency units) and on snapshots that are already canonical.
+    Never mutates its input: the shallow copy only has whole columns swapped out.
+    """
+    df = df.copy(deep=False)
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'], errors='coerce').dt.normalize().astype('datetime64[s]')
+    if 'Amount' in df.columns and not pd.api.types.is_integer_dtype(df['Amount']):
+        df['Amount'] = parse_amount_cents(df['Amount']).fillna(0).astype('int64')
+    for col in CATEGORICAL_COLS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+def format_for_sheets(df):
+    """Turns a canonical frame into plain text/float columns Google Sheets can take as JSON."""
+    df = df.copy(deep=False)
+    if 'Date' in df.columns and pd.api.types.is_datetime64_any_dtype(df['Date']):
+        df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
+    if 'Amount' in df.columns and pd.api.types.is_integer_dtype(df['Amount']):
+        df['Amount'] = cents_to_currency(df['Amount'])
+    for col in CATEGORICAL_COLS:
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(str)
+    return df
+
+def concat_canonical(frames):
+    """Concatenates cleaned chunks, re-unifying categoricals whose categories differ per chunk."""
+    df = pd.concat(frames, ignore_index=True)
+    for col in CATEGORICAL_COLS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
 def get_yesterday():
     """Calculates yesterday's date object for filtering."""
     return date.today() - timedelta(days=1)
@@ -37,28 +183,34 @@ def process_main_data(df):
         df = df[cols_to_keep].copy()
         df.columns = new_names
         
-        # 3. Date Cleaning
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+        # 3. Date Cleaning (day resolution)
+        df['Date'] = pd.to_datetime(df['Date'], errors='coerce').dt.normalize()
         df.dropna(subset=['Date'], inplace=True) 
+        df['Date'] = df['Date'].astype('datetime64[s]')
 
         # 4. NEW: Add Month column for Looker Studio
         # Format: '2025-01' (Better for sorting than 'January')
-        df['Month'] = df['Date'].dt.strftime('%Y-%m')
+        # Only the distinct months are formatted; rows just get category codes
+        month_codes, months = pd.factorize(df['Date'].values.astype('datetime64[M]'), sort=True)
+        df['Month'] = pd.Categorical.from_codes(month_codes, pd.DatetimeIndex(months).strftime('%Y-%m'))
 
-        # 5. Amount Cleaning
-        df['Amount'] = df['Amount'].astype(str).str.replace(r'[^\d\.]', '', regex=True)
-        df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
+        # 5. Amount Cleaning: integer cents
+        df['Amount'] = parse_amount_cents(df['Amount'])
         df.dropna(subset=['Amount'], inplace=True) 
-        df['Amount'] = df['Amount'].abs()
+        df['Amount'] = df['Amount'].abs().astype('int64')
 
         # 6. Filter Category & Max Date
         df['Category'] = df['Category'].astype(str).str.strip().str.title()
         if 'Country' in df.columns:
             df['Country'] = df['Country'].astype(str).str.strip().str.title()
-            
-        initial_count = len(df)
+
         df = df[~df['Category'].isin(["Flights"])]
-        df = df[df['Date'].dt.date <= max_date]
+        df = df[df['Date'] <= pd.Timestamp(max_date)]
+
+        # 7. Compact the dimension columns
+        for col in CATEGORICAL_COLS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
         
         logger.info(f"📊 Processed {len(df)} rows. 'Month' column added for Looker Studio.")
         
@@ -68,6 +220,44 @@ def process_main_data(df):
         logger.error(f"❌ Error in process_main_data: {str(e)}", exc_info=True)
         return None
 
+def fingerprint_transactions(df):
+    """
+    Builds a stable fingerprint per transaction from (Date, Amount, Category, Country).
+    Identical transactions on the same day get an occurrence suffix (-0, -1, ...)
+    so genuine repeats (two coffees at the same price) stay distinct.
+    """
+    dates = pd.to_datetime(df['Date'], errors='coerce').dt.strftime('%Y-%m-%d')
+    amounts = df['Amount']
+    if pd.api.types.is_integer_dtype(amounts):
+        amounts = cents_to_currency(amounts)
+    amounts = pd.to_numeric(amounts, errors='coerce').round(2).astype(str)
+    key = dates + '|' + amounts + '|' + df['Category'].astype(str)
+    if 'Country' in df.columns:
+        key = key + '|' + df['Country'].astype(str)
+
+    hashes = pd.util.hash_pandas_object(key, index=False).astype(str)
+    occurrence = key.groupby(key).cumcount().astype(str)
+    return hashes + '-' + occurrence
+
+def build_spend_cube(df):
+    """
+    Pre-aggregates transactions into a Country x Category x Day cube holding the
+    spend (Amount, int64 cents) and transaction count (Txn_Count) per cell.
+    The cube keeps the canonical column names, so every calculate_* below accepts
+    it in place of the raw frame; distinct-day counts come from its Date level.
+    Cost of downstream metrics then scales with days x categories, not transactions.
+    """
+    if df.empty:
+        return df
+
+    dims = [col for col in ['Country', 'Category', 'Date'] if col in df.columns]
+    cube = df.groupby(dims, observed=True, sort=False, dropna=False).agg(
+        Amount=('Amount', 'sum'),
+        Txn_Count=('Amount', 'size'),
+    ).reset_index()
+    logger.info(f"🧊 Built spend cube: {len(df)} transactions -> {len(cube)} cells.")
+    return cube
+
 def calculate_daily_average_per_category(df):
     """Calculates summary stats and average daily spend per category."""
     if df.empty or 'Date' not in df.columns: 
@@ -91,7 +281,7 @@ def calculate_daily_average_per_category(df):
     # Ensure trip_duration is at least 1 to avoid division by zero
     trip_duration = max(trip_duration, 1)
 
-    total_per_cat = df.groupby('Category')['Amount'].sum()
+    total_per_cat = cents_to_currency(df.groupby('Category', observed=True)['Amount'].sum())
     daily_avg = (total_per_cat / trip_duration).round(2).reset_index()
     daily_avg.columns = ['Category', 'Daily_Avg_Euro']
     logger.info(f"📈 Calculated daily averages over {trip_duration} days.")
@@ -103,10 +293,9 @@ def calculate_weekly_expenditure(df):
     """Calculates total weekly expenditure for bar charts."""
     if df.empty: return pd.Series()
 
-    # Resample by Week starting Monday ('W-MON')
-    df_copy = df.copy()
-    df_copy.set_index('Date', inplace=True)
-    weekly_sum = df_copy['Amount'].resample('W-MON').sum().reset_index()
+    # Resample by Week starting Monday ('W-MON'); re-index just the Amount column, not the frame
+    amounts_by_date = df['Amount'].set_axis(pd.DatetimeIndex(df['Date'], name='Date'))
+    weekly_sum = cents_to_currency(amounts_by_date.resample('W-MON').sum()).reset_index()
     
     weekly_sum.columns = ['Week_Start_Date', 'Total_Spend']
     weekly_sum['Week_Start_Date'] = weekly_sum['Week_Start_Date'].dt.strftime('%Y-%m-%d')
@@ -118,31 +307,23 @@ def calculate_average_daily_budget_per_country(df):
     if 'Country' not in df.columns or df.empty:
         return pd.DataFrame()
 
-    # 1. Create a copy to avoid SettingWithCopy warnings
-    temp_df = df.copy()
+    # 1. Build a row mask instead of copying and filtering the frame
     exclude_title = "Ireland".strip().title()
-        
-    temp_df = temp_df[temp_df['Country'] != exclude_title]
-
     exclude_Flights_title = "Flights".strip().title()
-        
-    temp_df = temp_df[temp_df['Category'] != exclude_Flights_title]
 
-    # 2. Force Date column to datetime objects safely
-    temp_df['Date'] = pd.to_datetime(temp_df['Date'], errors='coerce')
-    
+    # 2. Force Date column to datetime objects safely (a new Series; the input is untouched)
+    dates = pd.to_datetime(df['Date'], errors='coerce')
+
     # 3. Drop rows with invalid dates so they don't mess up the count
-    temp_df = temp_df.dropna(subset=['Date'])
+    keep = (df['Country'] != exclude_title) & (df['Category'] != exclude_Flights_title) & dates.notna()
+    countries = df['Country'][keep]
 
     # 4. Total Spend per country
-    spend = temp_df.groupby('Country')['Amount'].sum().reset_index()
+    spend = cents_to_currency(df['Amount'][keep].groupby(countries, observed=True).sum()).reset_index()
 
-    # 5. Distinct Days per country (No .dt needed if we do it this way)
-    # We convert to just the date part to ignore hours/minutes
-    days = temp_df.groupby('Country')['Date'].apply(lambda x: x.dt.date.nunique()).reset_index()
-    
-    # --- IF THE ABOVE STILL FAILS, USE THIS ALTERNATIVE FOR LINE 5: ---
-    # days = temp_df.groupby('Country')['Date'].nunique().reset_index()
+    # 5. Distinct Days per country
+    # Dates are day-resolution in the canonical frame, so a plain nunique is enough
+    days = dates[keep].groupby(countries, observed=True).nunique().reset_index()
 
     budget_df = pd.merge(spend, days, on='Country')
     budget_df.columns = ['Country', 'Total_Spend', 'Total_Days']
@@ -160,12 +341,12 @@ def calculate_comparative_weekly_spending(df):
     if 'Country' not in df.columns:
         return pd.DataFrame()
 
-    # Create a relative week number per country
-    df = df.copy()
-    df['Min_Date'] = df.groupby('Country')['Date'].transform('min')
-    df['Week_Num'] = ((df['Date'] - df['Min_Date']).dt.days // 7) + 1
+    # Create a relative week number per country (as a standalone Series, not a new column)
+    min_date = df.groupby('Country', observed=True)['Date'].transform('min')
+    week_num = (((df['Date'] - min_date).dt.days // 7) + 1).rename('Week_Num')
     
-    weekly_comp = df.groupby(['Country', 'Week_Num'])['Amount'].sum().reset_index()
+    weekly_comp = df['Amount'].groupby([df['Country'], week_num], observed=True).sum().reset_index()
+    weekly_comp['Amount'] = cents_to_currency(weekly_comp['Amount'])
     
     # Pivot so each Country is a column (Looker Studio loves this for comparisons)
     pivot_df = weekly_comp.pivot(index='Week_Num', columns='Country', values='Amount').fillna(0)
@@ -178,8 +359,9 @@ def calculate_category_percentages(df):
     if df.empty: return pd.DataFrame()
     
     total_spend = df['Amount'].sum()
-    cat_totals = df.groupby('Category')['Amount'].sum().reset_index()
+    cat_totals = df.groupby('Category', observed=True)['Amount'].sum().reset_index()
     cat_totals['Percentage'] = (cat_totals['Amount'] / total_spend).round(4)
+    cat_totals['Amount'] = cents_to_currency(cat_totals['Amount'])
     return cat_totals.sort_values(by='Percentage', ascending=False)
 
 def calculate_cumulative_spend(df):
@@ -187,7 +369,7 @@ def calculate_cumulative_spend(df):
     if df.empty: return pd.DataFrame()
     
     # Group by date first to handle multiple transactions on the same day
-    daily_total = df.groupby('Date')['Amount'].sum().reset_index()
+    daily_total = cents_to_currency(df.groupby('Date')['Amount'].sum()).reset_index()
     daily_total = daily_total.sort_values(by='Date')
     daily_total['Cumulative_Total'] = daily_total['Amount'].cumsum().round(2)
     
@@ -199,10 +381,15 @@ def calculate_weekend_vs_weekday(df):
     """Compares average spend on weekends vs weekdays."""
     if df.empty: return pd.DataFrame()
     
-    df_temp = df.copy()
     # 5 and 6 are Saturday and Sunday
-    df_temp['Is_Weekend'] = df_temp['Date'].dt.dayofweek >= 5
-    summary = df_temp.groupby('Is_Weekend')['Amount'].mean().round(2).reset_index()
+    is_weekend = (df['Date'].dt.dayofweek >= 5).rename('Is_Weekend')
+    # Mean per transaction; on a spend cube each row stands for Txn_Count transactions
+    amounts = df['Amount'].groupby(is_weekend).sum()
+    if 'Txn_Count' in df.columns:
+        counts = df['Txn_Count'].groupby(is_weekend).sum()
+    else:
+        counts = df['Amount'].groupby(is_weekend).size()
+    summary = cents_to_currency(amounts / counts).round(2).rename('Amount').reset_index()
     summary['Type'] = summary['Is_Weekend'].map({True: 'Weekend', False: 'Weekday'})
     return summary[['Type', 'Amount']]
 
@@ -212,11 +399,12 @@ def calculate_daily_avg_category_per_country(df):
         return pd.DataFrame()
 
     # 1. Get total days spent in each country
-    days_per_country = df.groupby('Country')['Date'].nunique().reset_index()
+    days_per_country = df.groupby('Country', observed=True)['Date'].nunique().reset_index()
     days_per_country.rename(columns={'Date': 'Days_in_Country'}, inplace=True)
 
     # 2. Get total spend per category per country
-    cat_country_spend = df.groupby(['Country', 'Category'])['Amount'].sum().reset_index()
+    cat_country_spend = df.groupby(['Country', 'Category'], observed=True)['Amount'].sum().reset_index()
+    cat_country_spend['Amount'] = cents_to_currency(cat_country_spend['Amount'])
 
     # 3. Merge them
     merged = pd.merge(cat_country_spend, days_per_country, on='Country')
@@ -240,23 +428,81 @@ def calculate_total_spend_per_country(df):
     if 'Country' not in df.columns or df.empty:
         return pd.DataFrame()
 
-    total_spend = df.groupby('Country')['Amount'].sum().reset_index()
+    total_spend = cents_to_currency(df.groupby('Country', observed=True)['Amount'].sum()).reset_index()
     # Sort so the highest spending country is at the top
     return total_spend.sort_values(by='Amount', ascending=True)
 
 def calculate_cumulative_spend_per_country_by_day(df):
     """Groups spend by country and day number for comparison."""
-    if df.empty:
+    if 'Country' not in df.columns or df.empty:
         return pd.DataFrame()
 
     # 1. Group by Country and Date to get daily totals
-    daily_country = df.groupby(['Country', 'Date'])['Amount'].sum().reset_index()
+    daily_country = df.groupby(['Country', 'Date'], observed=True)['Amount'].sum().reset_index()
+    daily_country['Amount'] = cents_to_currency(daily_country['Amount'])
     daily_country = daily_country.sort_values(['Country', 'Date'])
 
     # 2. Create the 'Day Number' column (Day 1, 2, 3...) for each country
-    daily_country['Day_Num'] = daily_country.groupby('Country').cumcount() + 1
+    daily_country['Day_Num'] = daily_country.groupby('Country', observed=True).cumcount() + 1
 
     # 3. Calculate the running total for each country
-    daily_country['Cumulative_Total'] = daily_country.groupby('Country')['Amount'].cumsum()
+    daily_country['Cumulative_Total'] = daily_country.groupby('Country', observed=True)['Amount'].cumsum()
+
+    return daily_country
+
+def calculate_spend_totals(df):
+    """Calculates the headline totals: overall spend and number of distinct days tracked."""
+    if df.empty: return pd.DataFrame()
+
+    return pd.DataFrame({
+        'Total_Spent': [cents_to_currency(df['Amount'].sum())],
+        'Days_Tracked': [df['Date'].nunique()],
+    })
+
+def calculate_recent_transactions(df, limit=15):
+    """Returns the latest transactions, newest first. Needs the raw frame, not the cube."""
+    if df.empty: return pd.DataFrame()
 
-    return daily_country
\ No newline at end of file
+    columns = [col for col in ['Date', 'Amount', 'Category', 'Country'] if col in df.columns]
+    return df.sort_values('Date', ascending=False, kind='stable').head(limit)[columns]
+
+# Summary tabs materialised at ingest time so the dashboard never scans raw transactions.
+# Keys are the Sheet/artifact names; every builder runs on the spend cube.
+SUMMARY_PREFIX = "Summary_"
+RECENT_TRANSACTIONS_TAB = "Summary_Recent_Transactions"
+SUMMARY_BUILDERS = {
+    "Summary_Totals": calculate_spend_totals,
+    "Summary_Daily_Avg_Per_Category": calculate_daily_average_per_category,
+    "Summary_Total_Spend_Per_Country": calculate_total_spend_per_country,
+    "Summary_Avg_Daily_Budget_Per_Country": calculate_average_daily_budget_per_country,
+    "Summary_Daily_Avg_Category_Per_Country": calculate_daily_avg_category_per_country,
+    "Summary_Cumulative_Spend": calculate_cumulative_spend,
+    "Summary_Cumulative_Spend_Per_Country": calculate_cumulative_spend_per_country_by_day,
+    "Summary_Weekly_Expenditure": calculate_weekly_expenditure,
+    "Summary_Category_Percentages": calculate_category_percentages,
+    "Summary_Weekend_vs_Weekday": calculate_weekend_vs_weekday,
+    "Summary_Comparative_Weekly": calculate_comparative_weekly_spending,
+}
+
+def build_summaries(df, cube=None):
+    """
+    Builds every summary table from the canonical frame.
+    Pass a prebuilt spend cube to skip re-aggregating the transactions.
+    Returns: A dictionary of summary name -> small DataFrame, with every summary present.
+    Empty results stay in as empty tables, so their tabs are overwritten and never keep
+    the numbers of an earlier upload.
+    """
+    if cube is None:
+        cube = build_spend_cube(df)
+
+    summaries = {}
+    for name, builder in SUMMARY_BUILDERS.items():
+        result = builder(cube)
+        # Pivoted summaries carry category labels as column names; Sheets and Feather want text
+        result.columns = [str(col) for col in result.columns]
+        summaries[name] = result.reset_index(drop=True)
+
+    summaries[RECENT_TRANSACTIONS_TAB] = calculate_recent_transactions(df).reset_index(drop=True)
+
+    logger.info(f"📦 Built {len(summaries)} summary tables.")
+    return summaries